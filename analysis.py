@@ -13,6 +13,10 @@ from itertools import combinations
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 import json
+import time
+import pyarrow as pa
+import pyarrow.parquet
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from openai import OpenAI
 
@@ -20,6 +24,10 @@ from openai import OpenAI
 from businesses import Businesses
 from settings import SettingsManager
 from file_processor import FileCleaner
+from rate_limiter import call_with_retries, estimate_tokens
+from prompt_compactor import TablePromptCompactor
+from analysis_plan_cache import AnalysisPlanCache
+from chart_planner import HeuristicChartPlanner
 
 
 
@@ -37,6 +45,19 @@ class AnalAI(FileCleaner):
     """
     
     
+    # Tables whose data is included alongside the main table in its insight prompt
+    RELATED_TABLES = {
+        'withdrawals': ['orders', 'users'],
+        'orders': ['users', 'businesses'],
+        'users': ['businesses'],
+        'sunhistory': ['users', 'businesses', 'orders'],
+    }
+
+    # Columns _filter_admin_data needs, always extracted
+    ADMIN_FILTER_COLUMNS = {'id', 'user_id', 'business_id', 'userid'}
+    # Columns never sent to the model: links, media and credentials
+    SKIPPED_COLUMN_PATTERN = re.compile(r'url|link|image|logo|avatar|photo|password|token|secret', re.IGNORECASE)
+
     def __init__(self):
         super().__init__()
         self.tables = [
@@ -51,11 +72,18 @@ class AnalAI(FileCleaner):
         ]
         self.weekly_insights = {}
         self.monthly_insights = {}
+        self.prompt_compactor = TablePromptCompactor(sample_rows=settings_manager.insight_sample_rows)
+        self.prompt_tokens = {}     # table -> estimated tokens of its last insight prompt
+        self._table_schemas = {}    # table -> (column names, probed at)
+        self._monthly_extract = None    # (extracted at, {table: DataFrame})
+        self.plan_cache = AnalysisPlanCache(settings_manager.analysis_plan_cache_path)
+        self.chart_planner = HeuristicChartPlanner()
 
     def generate_haiku(self):
         """Generate a haiku using OpenAI."""
         try:
             response = self.open_ai_client.chat.completions.create(
+                feature="haiku",
                 model="gpt-3.5-turbo",  
                 messages=[
                     {"role": "user", "content": "write a haiku about AI"}
@@ -118,54 +146,135 @@ class AnalAI(FileCleaner):
 
 
 
-    def extract_tables(self):
+    def _table_columns(self, table):
         """
-        Extracts the tables defined in self.tables as pandas DataFrames.
-        - If 'created_at' exists, gets records from the past 7 days.
-        - Otherwise, gets the most recent 14 records.
+        Column names of a table, probed with a one-row select and cached for
+        settings.table_schema_cache_minutes. Empty tables are not cached.
+        """
+        cached = self._table_schemas.get(table)
+        if cached and time.time() - cached[1] < settings_manager.table_schema_cache_minutes * 60:
+            return cached[0]
+
+        probe = self.supabase_client.table(table).select('*').limit(1).execute()
+        columns = list(probe.data[0].keys()) if probe.data else []
+        if columns:
+            self._table_schemas[table] = (columns, time.time())
+        return columns
+
+    def _extract_columns(self, columns):
+        """Columns worth pulling for insights: drops URLs, images and secrets, keeps admin filter keys"""
+        return [
+            column for column in columns
+            if column in self.ADMIN_FILTER_COLUMNS or not self.SKIPPED_COLUMN_PATTERN.search(column)
+        ]
+
+    def _extract_table(self, table, since, fallback_limit):
+        """
+        Pulls the needed columns of one table: rows created since `since` (capped at
+        settings.insight_row_limit, newest first), or the latest `fallback_limit` rows
+        when the table has no created_at column.
+        When the cap cuts the pull short, df.attrs records it ('truncated') together with
+        the real row count from the database ('total_rows'), so the prompt can say so.
+        """
+        columns = self._table_columns(table)
+        if not columns:
+            return pd.DataFrame()
+
+        query = self.supabase_client.table(table).select(','.join(self._extract_columns(columns)), count='exact')
+        if 'created_at' in columns:
+            limit = settings_manager.insight_row_limit
+            query = query.gte('created_at', since).order('created_at', desc=True).limit(limit)
+        else:
+            limit = fallback_limit
+            if 'id' in columns:
+                query = query.order('id', desc=True)  # Assuming 'id' is auto-incrementing
+            query = query.limit(limit)
+
+        response = query.execute()
+        rows = response.data or []
+        total_rows = getattr(response, 'count', None)
+        truncated = len(rows) >= limit and (total_rows is None or total_rows > len(rows))
+
+        df = self._filter_admin_data(pd.DataFrame(rows), table)
+        df.attrs = {'truncated': truncated, 'total_rows': total_rows if truncated else len(df)}
+        return df
+
+    def extract_monthly_tables(self):
+        """
+        Extracts the tables defined in self.tables as pandas DataFrames for the past 30 days.
+        - If 'created_at' exists, gets records from the past 30 days.
+        - Otherwise, gets the most recent 50 records.
         - Filters out admin user data from all tables.
+        The pull is reused for settings.table_extract_cache_minutes, so the weekly view
+        (extract_tables) does not query Supabase again.
         """
+        if self._monthly_extract and time.time() - self._monthly_extract[0] < settings_manager.table_extract_cache_minutes * 60:
+            return dict(self._monthly_extract[1])
+
         dataframe_data = {}
-        seven_days_ago = (datetime.utcnow() - timedelta(days=7)).isoformat()
+        thirty_days_ago = (datetime.utcnow() - timedelta(days=30)).isoformat()
 
         for table in self.tables:
             try:
-                # First, fetch column info to check for 'created_at'
-                columns_resp = self.supabase_client.table(table).select('*').limit(1).execute()
-                df_columns = pd.DataFrame(columns_resp.data)
-
-                if 'created_at' in df_columns.columns:
-                    # Table has 'created_at', filter last 7 days
-                    response = (
-                        self.supabase_client.table(table)
-                        .select('*')
-                        .gte('created_at', seven_days_ago)
-                        .order('created_at', desc=True)
-                        .execute()
-                    )
-                else:
-                    # No 'created_at', just get most recent 14 records
-                    response = (
-                        self.supabase_client.table(table)
-                        .select('*')
-                        .order('id', desc=True)  # Assuming 'id' is auto-incrementing
-                        .limit(14)
-                        .execute()
-                    )
-
-                df = pd.DataFrame(response.data)
-                
-                # Filter out admin data
-                df = self._filter_admin_data(df, table)
-                
-                dataframe_data[table] = df
-                
+                dataframe_data[table] = self._extract_table(table, thirty_days_ago, fallback_limit=50)
             except Exception as e:
                 print(f"Error extracting table {table}: {str(e)}")
                 dataframe_data[table] = pd.DataFrame()
 
+        self._monthly_extract = (time.time(), dataframe_data)
+        return dict(dataframe_data)
+
+    def extract_tables(self):
+        """
+        Extracts the tables defined in self.tables as pandas DataFrames.
+        - If 'created_at' exists, gets records from the past 7 days.
+        - Otherwise, gets the most recent 14 records.
+        - Filters out admin user data from all tables.
+        The 7-day view is cut in memory from the 30-day extract.
+        """
+        dataframe_data = {}
+        seven_days_ago = pd.Timestamp.now(tz='UTC') - pd.Timedelta(days=7)
+
+        for table, df in self.extract_monthly_tables().items():
+            if 'created_at' in df.columns:
+                created_at = pd.to_datetime(df['created_at'], utc=True, errors='coerce')
+                weekly = df[created_at >= seven_days_ago]
+                # The pull is newest first: if every row falls inside the week, a truncated
+                # pull may have cut the week short too (its real size is then unknown)
+                truncated = bool(df.attrs.get('truncated')) and len(weekly) == len(df)
+                weekly.attrs = {'truncated': truncated, 'total_rows': None if truncated else len(weekly)}
+                dataframe_data[table] = weekly
+            else:
+                dataframe_data[table] = df.head(14)
+
         return dataframe_data
 
+    def _table_context(self, dataframe_data, table_name):
+        """
+        Compact text for the main table and its related tables. The main table gets half of
+        settings.insight_prompt_token_budget (all of it when there are no related tables);
+        the related tables share the rest.
+        """
+        budget = settings_manager.insight_prompt_token_budget
+        related = [
+            name for name in self.RELATED_TABLES.get(table_name, [])
+            if not dataframe_data.get(name, pd.DataFrame()).empty
+        ]
+        main_budget = budget // 2 if related else budget
+
+        main_table_str = self.prompt_compactor.compact(dataframe_data[table_name], main_budget)
+        related_tables_str = ""
+        for name in related:
+            related_str = self.prompt_compactor.compact(dataframe_data[name], (budget - main_budget) // len(related))
+            related_tables_str += f"Related table: {name}\n{related_str}\n"
+
+        return main_table_str, related_tables_str
+
+    def _record_prompt_tokens(self, table_name, prompt):
+        tokens = estimate_tokens(prompt)
+        self.prompt_tokens[table_name] = tokens
+        print(f"[INSIGHTS] {table_name} prompt: ~{tokens} tokens")
+
     def generate_weekly_prompts(self):
         """
         Generates GPT prompts for weekly insights for all tables.
@@ -174,44 +283,8 @@ class AnalAI(FileCleaner):
         dataframe_data = self.extract_tables()
         prompts = {}
 
-        for table_name, main_df in dataframe_data.items():
-            # Convert main table to string (top 10 rows for context)
-            if not main_df.empty:
-                main_table_str = main_df.head(10).to_dict(orient='records')
-            else:
-                main_table_str = "No data available."
-
-            # Include related tables for correlations
-            related_tables_str = ""
-            if table_name == "withdrawals":
-                related_df = dataframe_data.get("orders", pd.DataFrame())
-                if not related_df.empty:
-                    related_tables_str = f"Related table: orders\n{related_df.head(10).to_dict(orient='records')}\n"
-                related_df2 = dataframe_data.get("users", pd.DataFrame())
-                if not related_df2.empty:
-                    related_tables_str += f"Related table: users\n{related_df2.head(10).to_dict(orient='records')}\n"
-            elif table_name == "orders":
-                related_df = dataframe_data.get("users", pd.DataFrame())
-                if not related_df.empty:
-                    related_tables_str = f"Related table: users\n{related_df.head(10).to_dict(orient='records')}\n"
-                related_df2 = dataframe_data.get("businesses", pd.DataFrame())
-                if not related_df2.empty:
-                    related_tables_str += f"Related table: businesses\n{related_df2.head(10).to_dict(orient='records')}\n"
-            elif table_name == "users":
-                related_df = dataframe_data.get("businesses", pd.DataFrame())
-                if not related_df.empty:
-                    related_tables_str = f"Related table: businesses\n{related_df.head(10).to_dict(orient='records')}\n"
-            elif table_name == "sunhistory":
-                # Add related tables for subscription analysis
-                related_df = dataframe_data.get("users", pd.DataFrame())
-                if not related_df.empty:
-                    related_tables_str = f"Related table: users\n{related_df.head(10).to_dict(orient='records')}\n"
-                related_df2 = dataframe_data.get("businesses", pd.DataFrame())
-                if not related_df2.empty:
-                    related_tables_str += f"Related table: businesses\n{related_df2.head(10).to_dict(orient='records')}\n"
-                related_df3 = dataframe_data.get("orders", pd.DataFrame())
-                if not related_df3.empty:
-                    related_tables_str += f"Related table: orders\n{related_df3.head(10).to_dict(orient='records')}\n"
+        for table_name in dataframe_data:
+            main_table_str, related_tables_str = self._table_context(dataframe_data, table_name)
 
             # Build the prompt with structured output requirement
             # Special prompt for sunhistory table
@@ -295,6 +368,7 @@ class AnalAI(FileCleaner):
                 Keep each section clear and separate. Focus only on real user behavior and patterns.
                 """
             prompts[table_name] = prompt
+            self._record_prompt_tokens(table_name, prompt)
 
         return prompts
 
@@ -339,63 +413,81 @@ class AnalAI(FileCleaner):
                 'recommendation': response_text
             }
 
-    def generate_weekly_insights(self):
+    def _request_insight(self, prompt):
+        """Sends one insight prompt to GPT (rate limited, with retries) and parses the response"""
+        estimated = estimate_tokens(prompt, completion_tokens=1000)
+
+        def request():
+            self.open_ai_limiter.acquire(estimated)
+            return self.open_ai_client.chat.completions.create(
+                feature="insights",
+                model="gpt-3.5-turbo",  
+                messages=[
+                    {"role": "user", "content": prompt}
+                ],
+                timeout=settings_manager.insight_timeout_seconds
+            )
+
+        response = call_with_retries(request, max_retries=settings_manager.open_ai_max_retries)
+
+        raw_response = response.choices[0].message.content
+        return self.parse_ai_response(raw_response)
+
+    def _generate_insights(self, prompts, on_progress=None):
         """
-        Sends weekly prompts to GPT for all tables and stores the insights in structured format.
+        Sends every table prompt to GPT concurrently (settings.insight_workers at a time,
+        each call bounded by settings.insight_timeout_seconds). A table that fails gets an
+        error entry; the other tables keep their insights.
+        on_progress(table_name, status) is called as each table moves to running/done/failed.
         """
-        self.weekly_insights = {}
-        prompts = self.generate_weekly_prompts()
+        insights = {}
+        started_at = time.time()
+        report = on_progress or (lambda table_name, status: None)
 
-        for table_name, prompt in prompts.items():
-            try:
-                response = self.open_ai_client.chat.completions.create(
-                    model="gpt-3.5-turbo",  
-                    messages=[
-                        {"role": "user", "content": prompt}
-                    ]
-                )
-                
-                raw_response = response.choices[0].message.content
-                
-                # Parse the response into structured format
-                parsed_response = self.parse_ai_response(raw_response)
-                self.weekly_insights[table_name] = parsed_response
+        def request(table_name, prompt):
+            report(table_name, 'running')
+            return self._request_insight(prompt)
 
-            except Exception as e:
-                self.weekly_insights[table_name] = {
-                    'concern': f"Error generating insight: {str(e)}",
-                    'recommendation': "Unable to generate recommendations due to error"
-                }
+        for table_name in prompts:
+            report(table_name, 'queued')
+
+        with ThreadPoolExecutor(max_workers=settings_manager.insight_workers) as executor:
+            futures = {
+                executor.submit(request, table_name, prompt): table_name
+                for table_name, prompt in prompts.items()
+            }
+            for future in as_completed(futures):
+                table_name = futures[future]
+                try:
+                    insights[table_name] = future.result()
+                    report(table_name, 'done')
+                except Exception as e:
+                    report(table_name, 'failed')
+                    print(f"[INSIGHTS] {table_name} failed: {e}")
+                    insights[table_name] = {
+                        'concern': f"Error generating insight: {str(e)}",
+                        'recommendation': "Unable to generate recommendations due to error"
+                    }
 
+        print(f"[INSIGHTS] {len(prompts)} tables in {time.time() - started_at:.1f}s")
+        # Keep the table order of the prompts for the stored report
+        return {table_name: insights[table_name] for table_name in prompts}
+
+    def generate_weekly_insights(self, on_progress=None):
+        """
+        Sends weekly prompts to GPT for all tables and stores the insights in structured format.
+        """
+        prompts = self.generate_weekly_prompts()
+        self.weekly_insights = self._generate_insights(prompts, on_progress)
         return self.weekly_insights
 
-    def generate_monthly_insights(self):
+    def generate_monthly_insights(self, on_progress=None):
         """
         Sends monthly prompts to GPT for all tables and stores the insights in structured format.
         Monthly insights provide deeper analysis over a longer period.
         """
-        self.monthly_insights = {}
         prompts = self.generate_monthly_prompts()
-
-        for table_name, prompt in prompts.items():
-            try:
-                response = self.open_ai_client.chat.completions.create(
-                    model="gpt-3.5-turbo",  
-                    messages=[
-                        {"role": "user", "content": prompt}
-                    ]
-                )
-                
-                raw_response = response.choices[0].message.content
-                parsed_response = self.parse_ai_response(raw_response)
-                self.monthly_insights[table_name] = parsed_response
-
-            except Exception as e:
-                self.monthly_insights[table_name] = {
-                    'concern': f"Error generating insight: {str(e)}",
-                    'recommendation': "Unable to generate recommendations due to error"
-                }
-
+        self.monthly_insights = self._generate_insights(prompts, on_progress)
         return self.monthly_insights
 
 
@@ -409,43 +501,8 @@ class AnalAI(FileCleaner):
         dataframe_data = self.extract_monthly_tables()
         prompts = {}
 
-        for table_name, main_df in dataframe_data.items():
-            # Convert main table to string (top 15 rows for context)
-            if not main_df.empty:
-                main_table_str = main_df.head(15).to_dict(orient='records')
-            else:
-                main_table_str = "No data available."
-
-            # Include related tables for correlations
-            related_tables_str = ""
-            if table_name == "withdrawals":
-                related_df = dataframe_data.get("orders", pd.DataFrame())
-                if not related_df.empty:
-                    related_tables_str = f"Related table: orders\n{related_df.head(15).to_dict(orient='records')}\n"
-                related_df2 = dataframe_data.get("users", pd.DataFrame())
-                if not related_df2.empty:
-                    related_tables_str += f"Related table: users\n{related_df2.head(15).to_dict(orient='records')}\n"
-            elif table_name == "orders":
-                related_df = dataframe_data.get("users", pd.DataFrame())
-                if not related_df.empty:
-                    related_tables_str = f"Related table: users\n{related_df.head(15).to_dict(orient='records')}\n"
-                related_df2 = dataframe_data.get("businesses", pd.DataFrame())
-                if not related_df2.empty:
-                    related_tables_str += f"Related table: businesses\n{related_df2.head(15).to_dict(orient='records')}\n"
-            elif table_name == "users":
-                related_df = dataframe_data.get("businesses", pd.DataFrame())
-                if not related_df.empty:
-                    related_tables_str = f"Related table: businesses\n{related_df.head(15).to_dict(orient='records')}\n"
-            elif table_name == "sunhistory":
-                related_df = dataframe_data.get("users", pd.DataFrame())
-                if not related_df.empty:
-                    related_tables_str = f"Related table: users\n{related_df.head(15).to_dict(orient='records')}\n"
-                related_df2 = dataframe_data.get("businesses", pd.DataFrame())
-                if not related_df2.empty:
-                    related_tables_str += f"Related table: businesses\n{related_df2.head(15).to_dict(orient='records')}\n"
-                related_df3 = dataframe_data.get("orders", pd.DataFrame())
-                if not related_df3.empty:
-                    related_tables_str += f"Related table: orders\n{related_df3.head(15).to_dict(orient='records')}\n"
+        for table_name in dataframe_data:
+            main_table_str, related_tables_str = self._table_context(dataframe_data, table_name)
 
             # Build the monthly prompt with deeper analysis
             if table_name == "sunhistory":
@@ -538,58 +595,11 @@ class AnalAI(FileCleaner):
                 Focus only on real user behavior and patterns.
                 """
             prompts[table_name] = prompt
+            self._record_prompt_tokens(table_name, prompt)
 
         return prompts
 
 
-    def extract_monthly_tables(self):
-        """
-        Extracts the tables defined in self.tables as pandas DataFrames for the past 30 days.
-        - If 'created_at' exists, gets records from the past 30 days.
-        - Otherwise, gets the most recent 50 records.
-        - Filters out admin user data from all tables.
-        """
-        dataframe_data = {}
-        thirty_days_ago = (datetime.utcnow() - timedelta(days=30)).isoformat()
-
-        for table in self.tables:
-            try:
-                # First, fetch column info to check for 'created_at'
-                columns_resp = self.supabase_client.table(table).select('*').limit(1).execute()
-                df_columns = pd.DataFrame(columns_resp.data)
-
-                if 'created_at' in df_columns.columns:
-                    # Table has 'created_at', filter last 30 days
-                    response = (
-                        self.supabase_client.table(table)
-                        .select('*')
-                        .gte('created_at', thirty_days_ago)
-                        .order('created_at', desc=True)
-                        .execute()
-                    )
-                else:
-                    response = (
-                        self.supabase_client.table(table)
-                        .select('*')
-                        .order('id', desc=True)
-                        .limit(50)
-                        .execute()
-                    )
-
-                df = pd.DataFrame(response.data)
-                
-                # Filter out admin data
-                df = self._filter_admin_data(df, table)
-                
-                dataframe_data[table] = df
-                
-            except Exception as e:
-                print(f"Error extracting table {table}: {str(e)}")
-                dataframe_data[table] = pd.DataFrame()
-
-        return dataframe_data
-
-
     def store_monthly_report(self, data):
         """Stores the monthly report in the database. Only one report per 30-day cycle."""
 
@@ -701,9 +711,31 @@ class AnalAI(FileCleaner):
 
 
     
-    def clean_file(self, file):
+    def _read_arrow(self, source, parquet):
         """
-        Returns a cleaned DataFrame from an uploaded file.
+        Reads a Parquet or Arrow IPC (Feather v2) upload. Paths are memory-mapped, so columns
+        are not copied on read. With settings.keep_arrow_dtypes the DataFrame keeps the
+        Arrow-backed dtypes instead of converting to NumPy columns.
+        """
+        types_mapper = pd.ArrowDtype if settings_manager.keep_arrow_dtypes else None
+        is_path = isinstance(source, (str, os.PathLike))
+
+        if parquet:
+            table = pa.parquet.read_table(source, memory_map=is_path)
+        else:
+            arrow_file = pa.memory_map(str(source)) if is_path else pa.PythonFile(source, mode='r')
+            try:
+                table = pa.ipc.open_file(arrow_file).read_all()
+            except pa.ArrowInvalid:
+                # Arrow IPC stream format rather than the file format
+                arrow_file.seek(0)
+                table = pa.ipc.open_stream(arrow_file).read_all()
+
+        return table.to_pandas(types_mapper=types_mapper)
+
+    def read_file(self, file):
+        """
+        Returns the raw DataFrame of an uploaded file (CSV, Excel, Parquet or Arrow IPC).
         File can be a file path, file-like object, or Flask FileStorage object.
         """
         df = None  # ensure variable is always defined
@@ -722,8 +754,12 @@ class AnalAI(FileCleaner):
                     df = pd.read_excel(file.stream)
                 except Exception:
                     df = pd.read_excel(file)  # fallback
+            elif filename.endswith((".parquet", ".arrow", ".feather")):
+                stream = file.stream if hasattr(file, 'stream') else file
+                stream.seek(0)
+                df = self._read_arrow(stream, parquet=filename.endswith(".parquet"))
             else:
-                raise ValueError(f"Unsupported file format: {filename}. Please upload CSV or Excel only.")
+                raise ValueError(f"Unsupported file format: {filename}. Please upload CSV, Excel, Parquet or Arrow only.")
         else:
             # Handle file paths
             ext = str(file).lower()
@@ -731,53 +767,79 @@ class AnalAI(FileCleaner):
                 df = pd.read_csv(file)
             elif ext.endswith((".xls", ".xlsx")):
                 df = pd.read_excel(file)
+            elif ext.endswith((".parquet", ".arrow", ".feather")):
+                df = self._read_arrow(file, parquet=ext.endswith(".parquet"))
             else:
-                raise ValueError(f"Unsupported file format: {file}. Please upload CSV or Excel only.")
+                raise ValueError(f"Unsupported file format: {file}. Please upload CSV, Excel, Parquet or Arrow only.")
 
         if df is None:
             raise ValueError("Could not read the provided file into a DataFrame.")
 
-        return self.clean_all(df)
+        return df
+
+    def _csv_source(self, file):
+        """Returns (readable source, size in bytes) for a CSV upload or path, or None for other formats"""
+        if hasattr(file, 'filename'):
+            if not file.filename.lower().endswith(".csv"):
+                return None
+            source = file.stream if hasattr(file, 'stream') else file
+            source.seek(0, os.SEEK_END)
+            size = source.tell()
+            source.seek(0)
+            return source, size
+        if str(file).lower().endswith(".csv"):
+            return file, os.path.getsize(file)
+        return None
+
+    def is_large_csv(self, file):
+        """True when a CSV is big enough to be cleaned in chunks (settings.clean_streaming_min_mb)"""
+        csv_source = self._csv_source(file)
+        return bool(csv_source) and csv_source[1] >= settings_manager.clean_streaming_min_mb * 1024 * 1024
+
+    def clean_file(self, file):
+        """
+        Returns a cleaned DataFrame from an uploaded file.
+        File can be a file path, file-like object, or Flask FileStorage object.
+        Large CSVs are read and cleaned in chunks, so the raw file is never fully in memory.
+        """
+        if self.is_large_csv(file):
+            source, size = self._csv_source(file)
+            print(f"Cleaning {size / 1024 / 1024:.1f} MB CSV in chunks of {settings_manager.clean_chunk_rows} rows")
+            return self.clean_csv_in_chunks(source)
+        return self.clean_all(self.read_file(file))
 
 
     
-    def ai_analyse_df(self, df):
+    def plan_analysis(self, df):
         """
-        Returns DataFrames of relationships that have been analysed from the dataframe by OpenAI.
-        The AI identifies patterns and returns structured data suitable for chart creation.
-        
-        :param df: pandas DataFrame to analyze
-        :return: dict containing chart_data and metadata for visualization
+        Asks OpenAI which 2-3 charts to build for the DataFrame.
+        Returns the parsed plan: {"analyses": [...], "source": "ai" | "cache" | "heuristic"}.
+        Plans are cached by a fingerprint of the columns, dtype kinds and coarse statistics,
+        so a structurally identical upload skips the OpenAI call. With
+        settings.custom_analysis_offline, or when OpenAI fails, the rule-based plan is used.
         """
         import time
-        start_time = time.time()
-        
-        print("\n" + "-"*50)
-        print("AI_ANALYSE_DF STARTED")
-        print("-"*50)
-        
-        if df is None or not hasattr(df, 'empty'):
-            print("ERROR: No DataFrame provided")
-            return {"error": "No DataFrame provided for analysis"}
-        
-        if df.empty:
-            print("ERROR: DataFrame is empty")
-            return {"error": "DataFrame is empty"}
-        
-        print(f"✓ DataFrame validation passed")
-        print(f"  Shape: {df.shape}")
-        print(f"  Columns: {list(df.columns)}")
+
+        if settings_manager.custom_analysis_offline:
+            print("\n1. Offline mode, using heuristic plan")
+            return self.heuristic_plan(df)
+
+        # Prepare DataFrame summary for AI analysis
+        print("\n1. Preparing DataFrame summary...")
+        summary_start = time.time()
+        df_info = self._prepare_dataframe_summary(df)
+        print(f"✓ Summary prepared in {time.time() - summary_start:.2f}s")
+
+        fingerprint = self.plan_cache.fingerprint(df, df_info)
+        cached_plan = self.plan_cache.get(fingerprint)
+        self.llm_metrics.record_cache("custom_analysis", hit=bool(cached_plan))
+        if cached_plan:
+            print(f"✓ Analysis plan cache hit ({fingerprint[:12]}), skipping OpenAI")
+            return {**cached_plan, 'source': 'cache'}
         
-        try:
-            # Prepare DataFrame summary for AI analysis
-            print("\n1. Preparing DataFrame summary...")
-            summary_start = time.time()
-            df_info = self._prepare_dataframe_summary(df)
-            print(f"✓ Summary prepared in {time.time() - summary_start:.2f}s")
-            
-            # Create prompt for AI analysis
-            print("\n2. Creating AI prompt...")
-            prompt = f"""
+        # Create prompt for AI analysis
+        print("\n2. Creating AI prompt...")
+        prompt = f"""
     You are a data analyst. Analyze the following dataset and identify meaningful patterns and relationships that can be visualized in charts.
 
     Dataset Information:
@@ -821,85 +883,155 @@ class AnalAI(FileCleaner):
     Think creatively about calculated columns that could reveal hidden insights.
     Ensure each analysis can be implemented with the available columns or calculated columns.
     """
-            print(f"✓ Prompt created ({len(prompt)} characters)")
+        print(f"✓ Prompt created ({len(prompt)} characters)")
 
-            # Get AI analysis
-            print("\n3. Calling OpenAI API...")
-            api_start = time.time()
-            
-            try:
-                response = self.open_ai_client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.3
-                )
-                api_time = time.time() - api_start
-                print(f"✓ OpenAI responded in {api_time:.2f}s")
-            except Exception as e:
-                print(f"ERROR calling OpenAI: {str(e)}")
-                raise
-            
-            ai_response = response.choices[0].message.content
-            
-            if not ai_response:
-                print("ERROR: OpenAI returned empty response")
-                return {"error": "OpenAI returned empty response"}
+        # Get AI analysis
+        print("\n3. Calling OpenAI API...")
+        api_start = time.time()
+        
+        estimated = estimate_tokens(prompt, completion_tokens=1000)
+
+        def request():
+            self.open_ai_limiter.acquire(estimated)
+            return self.open_ai_client.chat.completions.create(
+                feature="custom_analysis",
+                model="gpt-3.5-turbo",
+                messages=[
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.3
+            )
+
+        try:
+            response = call_with_retries(request, max_retries=settings_manager.open_ai_max_retries)
+            api_time = time.time() - api_start
+            print(f"✓ OpenAI responded in {api_time:.2f}s")
+        except Exception as e:
+            print(f"ERROR calling OpenAI: {str(e)}, using heuristic plan")
+            return self.heuristic_plan(df)
+        
+        ai_response = response.choices[0].message.content
+        
+        if not ai_response:
+            print("OpenAI returned empty response, using heuristic plan")
+            return self.heuristic_plan(df)
+        
+        print(f"  Response length: {len(ai_response)} characters")
+        print(f"  First 200 chars: {ai_response[:200]}...")
+        
+        # Parse AI response
+        print("\n4. Parsing AI response...")
+        parse_start = time.time()
+        analyses = self._parse_ai_analysis_response(ai_response, df)
+        print(f"✓ Parsed in {time.time() - parse_start:.2f}s")
+        print(f"  Found {len(analyses.get('analyses', []))} analyses")
+
+        if analyses.get('source') == 'heuristic':
+            return analyses
+
+        # Only cache plans that refer to this data's columns
+        if self._plan_uses_columns(analyses, df):
+            self.plan_cache.set(fingerprint, analyses, df.columns)
+        return {**analyses, 'source': 'ai'}
+
+    def heuristic_plan(self, df):
+        """Rule-based chart plan (no network): {"analyses": [...], "source": "heuristic"}"""
+        return {**self.chart_planner.plan(df), 'source': 'heuristic'}
+
+    def _plan_uses_columns(self, plan, df):
+        """True if some planned chart refers to a column of the DataFrame"""
+        for analysis in plan.get('analyses', []):
+            if not isinstance(analysis, dict):
+                continue
+            for key in ('x_column', 'y_column', 'group_by'):
+                if analysis.get(key) in df.columns:
+                    return True
+        return False
+
+    def build_chart(self, df, analysis, index):
+        """
+        Builds the chart DataFrame for one planned analysis.
+        Returns (chart_key, {'dataframe', 'metadata'}), or None when nothing could be charted.
+        """
+        print(f"\n  Chart {index}:")
+        print(f"    Title: {analysis.get('title', 'N/A')}")
+        print(f"    Type: {analysis.get('chart_type', 'N/A')}")
+        
+        try:
+            # Create calculated column if specified
+            analysis_df = df.copy()
+            if 'calculated_column' in analysis and analysis['calculated_column']:
+                calc_col = analysis['calculated_column']
+                calc_name = calc_col.get('name', 'N/A') if isinstance(calc_col, dict) else 'N/A'
+                print(f"    Adding calculated column: {calc_name}")
+                analysis_df = self._add_calculated_column(analysis_df, analysis['calculated_column'])
             
-            print(f"  Response length: {len(ai_response)} characters")
-            print(f"  First 200 chars: {ai_response[:200]}...")
+            print(f"    Creating chart dataframe...")
+            chart_df = self._create_chart_dataframe(analysis_df, analysis)
             
-            # Parse AI response
-            print("\n4. Parsing AI response...")
-            parse_start = time.time()
-            analyses = self._parse_ai_analysis_response(ai_response)
-            print(f"✓ Parsed in {time.time() - parse_start:.2f}s")
-            print(f"  Found {len(analyses.get('analyses', []))} analyses")
+            if chart_df.empty:
+                print(f"    ⚠ Empty dataframe, skipping")
+                return None
+
+            chart_key = f"chart_{index}_{analysis['chart_type']}"
+            print(f"    ✓ Chart created ({len(chart_df)} rows)")
+            return chart_key, {
+                'dataframe': chart_df,
+                'metadata': {
+                    'title': analysis['title'],
+                    'description': analysis['description'],
+                    'chart_type': analysis['chart_type'],
+                    'x_label': analysis.get('x_column', 'Category'),
+                    'y_label': analysis.get('y_column', 'Value'),
+                    'calculated_column': analysis.get('calculated_column')
+                }
+            }
+                
+        except Exception as e:
+            print(f"    ERROR: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return None
+
+    def ai_analyse_df(self, df):
+        """
+        Returns DataFrames of relationships that have been analysed from the dataframe by OpenAI.
+        The AI identifies patterns and returns structured data suitable for chart creation.
+        
+        :param df: pandas DataFrame to analyze
+        :return: dict containing chart_data and metadata for visualization
+        """
+        import time
+        start_time = time.time()
+        
+        print("\n" + "-"*50)
+        print("AI_ANALYSE_DF STARTED")
+        print("-"*50)
+        
+        if df is None or not hasattr(df, 'empty'):
+            print("ERROR: No DataFrame provided")
+            return {"error": "No DataFrame provided for analysis"}
+        
+        if df.empty:
+            print("ERROR: DataFrame is empty")
+            return {"error": "DataFrame is empty"}
+        
+        print(f"✓ DataFrame validation passed")
+        print(f"  Shape: {df.shape}")
+        print(f"  Columns: {list(df.columns)}")
+        
+        try:
+            analyses = self.plan_analysis(df)
             
             # Generate actual DataFrames based on AI recommendations
             print("\n5. Creating chart DataFrames...")
             chart_dataframes = {}
             
             for i, analysis in enumerate(analyses.get('analyses', [])):
-                print(f"\n  Chart {i+1}:")
-                print(f"    Title: {analysis.get('title', 'N/A')}")
-                print(f"    Type: {analysis.get('chart_type', 'N/A')}")
-                
-                try:
-                    # Create calculated column if specified
-                    analysis_df = df.copy()
-                    if 'calculated_column' in analysis and analysis['calculated_column']:
-                        calc_col = analysis['calculated_column']
-                        calc_name = calc_col.get('name', 'N/A') if isinstance(calc_col, dict) else 'N/A'
-                        print(f"    Adding calculated column: {calc_name}")
-                        analysis_df = self._add_calculated_column(analysis_df, analysis['calculated_column'])
-                    
-                    print(f"    Creating chart dataframe...")
-                    chart_df = self._create_chart_dataframe(analysis_df, analysis)
-                    
-                    if not chart_df.empty:
-                        chart_key = f"chart_{i+1}_{analysis['chart_type']}"
-                        chart_dataframes[chart_key] = {
-                            'dataframe': chart_df,
-                            'metadata': {
-                                'title': analysis['title'],
-                                'description': analysis['description'],
-                                'chart_type': analysis['chart_type'],
-                                'x_label': analysis.get('x_column', 'Category'),
-                                'y_label': analysis.get('y_column', 'Value'),
-                                'calculated_column': analysis.get('calculated_column')
-                            }
-                        }
-                        print(f"    ✓ Chart created ({len(chart_df)} rows)")
-                    else:
-                        print(f"    ⚠ Empty dataframe, skipping")
-                        
-                except Exception as e:
-                    print(f"    ERROR: {str(e)}")
-                    import traceback
-                    traceback.print_exc()
-                    continue
+                chart = self.build_chart(df, analysis, i + 1)
+                if chart:
+                    chart_key, chart_data = chart
+                    chart_dataframes[chart_key] = chart_data
             
             total_time = time.time() - start_time
             print(f"\n{'-'*50}")
@@ -920,6 +1052,17 @@ class AnalAI(FileCleaner):
             traceback.print_exc()
             return {"error": f"Analysis failed: {str(e)}"}
 
+    @staticmethod
+    def _widen(series):
+        """int64/float64 view of a numeric column (downcast by compact_dtypes); other columns unchanged"""
+        if pd.api.types.is_bool_dtype(series) or isinstance(series.dtype, pd.ArrowDtype):
+            return series
+        if pd.api.types.is_integer_dtype(series):
+            return series.astype('int64')
+        if pd.api.types.is_float_dtype(series):
+            return series.astype('float64')
+        return series
+
     def _add_calculated_column(self, df, calc_config):
         """Add a calculated column to the DataFrame based on AI recommendations"""
         try:
@@ -934,6 +1077,9 @@ class AnalAI(FileCleaner):
             if not all(col in df.columns for col in columns_used):
                 print(f"Missing columns for calculation: {columns_used}")
                 return df
+
+            # Compacted (downcast) columns are widened first so the arithmetic cannot overflow
+            operands = {col: self._widen(df[col]) for col in columns_used}
             
             # Perform common calculations based on formula description
             if len(columns_used) == 2:
@@ -941,35 +1087,35 @@ class AnalAI(FileCleaner):
                 
                 if any(word in formula for word in ['multiply', '*', 'total', 'sales']):
                     # Multiplication (e.g., price * quantity = total_sales)
-                    df[col_name] = df[col1] * df[col2]
+                    df[col_name] = operands[col1] * operands[col2]
                 elif any(word in formula for word in ['subtract', '-', 'profit', 'difference']):
                     # Subtraction (e.g., revenue - cost = profit)
-                    df[col_name] = df[col1] - df[col2]
+                    df[col_name] = operands[col1] - operands[col2]
                 elif any(word in formula for word in ['add', '+', 'sum', 'total']):
                     # Addition
-                    df[col_name] = df[col1] + df[col2]
+                    df[col_name] = operands[col1] + operands[col2]
                 elif any(word in formula for word in ['divide', '/', 'ratio', 'rate']):
                     # Division (avoid division by zero)
-                    df[col_name] = df[col1] / df[col2].replace(0, np.nan)
+                    df[col_name] = operands[col1] / operands[col2].replace(0, np.nan)
                 else:
                     # Default to multiplication if unclear
-                    df[col_name] = df[col1] * df[col2]
+                    df[col_name] = operands[col1] * operands[col2]
                     
             elif len(columns_used) == 1:
                 col1 = columns_used[0]
                 
                 if any(word in formula for word in ['percentage', 'percent', '%']):
                     # Convert to percentage
-                    df[col_name] = df[col1] * 100
+                    df[col_name] = operands[col1] * 100
                 elif any(word in formula for word in ['square', 'squared']):
                     # Square the value
-                    df[col_name] = df[col1] ** 2
+                    df[col_name] = operands[col1] ** 2
                 elif any(word in formula for word in ['absolute', 'abs']):
                     # Absolute value
-                    df[col_name] = df[col1].abs()
+                    df[col_name] = operands[col1].abs()
                 else:
                     # Default: just copy the column
-                    df[col_name] = df[col1]
+                    df[col_name] = operands[col1]
             
             print(f"Added calculated column '{col_name}' using formula: {formula}")
             return df
@@ -993,7 +1139,7 @@ class AnalAI(FileCleaner):
             summary['statistics']['numeric'] = df[numeric_cols].describe().to_dict()
         
         # Get value counts for categorical columns (top 5 values)
-        categorical_cols = df.select_dtypes(include=['object', 'category']).columns
+        categorical_cols = df.select_dtypes(include=['object', 'category', 'string']).columns
         summary['statistics']['categorical'] = {}
         for col in categorical_cols[:3]:  # Limit to first 3 categorical columns
             value_counts = df[col].value_counts().head(5).to_dict()
@@ -1001,41 +1147,24 @@ class AnalAI(FileCleaner):
         
         return summary
 
-    def _parse_ai_analysis_response(self, response_text):
-        """Parse the AI response to extract analysis recommendations"""
+    def _parse_ai_analysis_response(self, response_text, df):
+        """
+        Parse the AI response to extract analysis recommendations.
+        When no usable JSON comes back, the rule-based plan for df is used instead
+        (marked with "source": "heuristic").
+        """
         try:
             # Try to find JSON in the response
-            import re
             json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
             if json_match:
-                json_str = json_match.group(0)
-                return json.loads(json_str)
-            else:
-                # Fallback: create a basic analysis structure
-                return {
-                    "analyses": [
-                        {
-                            "title": "Data Overview",
-                            "description": "Basic data distribution",
-                            "chart_type": "bar",
-                            "data_transformation": "Group by first categorical column",
-                            "aggregation": "count"
-                        }
-                    ]
-                }
+                plan = json.loads(json_match.group(0))
+                if plan.get('analyses'):
+                    return plan
+            print("No analyses in AI response, using heuristic plan")
         except Exception as e:
             print(f"Error parsing AI response: {str(e)}")
-            # Return fallback analysis
-            return {
-                "analyses": [
-                    {
-                        "title": "Data Summary",
-                        "description": "Basic data analysis",
-                        "chart_type": "bar", 
-                        "aggregation": "count"
-                    }
-                ]
-            }
+
+        return self.heuristic_plan(df)
 
     def _create_chart_dataframe(self, df, analysis):
         """Create a DataFrame suitable for charting based on AI analysis"""
@@ -1066,7 +1195,7 @@ class AnalAI(FileCleaner):
         
         # Find a suitable categorical column if not specified
         if not group_col:
-            categorical_cols = df.select_dtypes(include=['object', 'category']).columns
+            categorical_cols = df.select_dtypes(include=['object', 'category', 'string']).columns
             if len(categorical_cols) > 0:
                 group_col = categorical_cols[0]
             else:
@@ -1089,7 +1218,7 @@ class AnalAI(FileCleaner):
         
         # Auto-select columns if not specified
         if not group_col:
-            categorical_cols = df.select_dtypes(include=['object', 'category']).columns
+            categorical_cols = df.select_dtypes(include=['object', 'category', 'string']).columns
             group_col = categorical_cols[0] if len(categorical_cols) > 0 else df.columns[0]
         
         if not value_col and aggregation != 'count':
@@ -1105,13 +1234,13 @@ class AnalAI(FileCleaner):
             bar_data.columns = ['category', 'value']
         elif value_col and value_col in df.columns:
             if aggregation == 'sum':
-                bar_data = df.groupby(group_col)[value_col].sum().reset_index()
+                bar_data = df.groupby(group_col, observed=True)[value_col].sum().reset_index()
             elif aggregation == 'mean':
-                bar_data = df.groupby(group_col)[value_col].mean().reset_index()
+                bar_data = df.groupby(group_col, observed=True)[value_col].mean().reset_index()
             elif aggregation == 'median':
-                bar_data = df.groupby(group_col)[value_col].median().reset_index()
+                bar_data = df.groupby(group_col, observed=True)[value_col].median().reset_index()
             else:
-                bar_data = df.groupby(group_col)[value_col].count().reset_index()
+                bar_data = df.groupby(group_col, observed=True)[value_col].count().reset_index()
             
             bar_data.columns = ['category', 'value']
         else:
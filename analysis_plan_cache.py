@@ -0,0 +1,119 @@
+"""
+Analysis Plan Cache Module
+Persistent SQLite cache of custom-analysis chart plans keyed by a fingerprint of the dataset's shape
+"""
+import hashlib
+import json
+import math
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+import pandas as pd
+
+
+class AnalysisPlanCache:
+    """
+    Maps a structural fingerprint of a DataFrame (column names, dtype kinds, coarse statistics)
+    to the analysis plan the AI returned, so re-uploads of the same or a structurally
+    identical file only recompute the charts.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS analysis_plans (
+                fingerprint TEXT PRIMARY KEY,
+                plan TEXT NOT NULL,
+                columns TEXT,
+                created_at TEXT NOT NULL
+            )
+            """
+        )
+        self._connection.commit()
+
+    @staticmethod
+    def _magnitude(value):
+        """Order of magnitude bucket, so next month's totals still match this month's"""
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return None
+        if not math.isfinite(value) or value == 0:
+            return 0
+        return int(math.copysign(math.floor(math.log10(abs(value))) + 1, value))
+
+    @staticmethod
+    def _dtype_kind(dtype):
+        """
+        Coarse type of a column. The exact dtype depends on the data once the cleaner has
+        compacted it (int8 vs int16, float32 vs float64, category vs object), so it is not
+        part of the fingerprint.
+        """
+        if pd.api.types.is_bool_dtype(dtype):
+            return 'bool'
+        if pd.api.types.is_integer_dtype(dtype):
+            return 'int'
+        if pd.api.types.is_float_dtype(dtype):
+            return 'float'
+        if pd.api.types.is_datetime64_any_dtype(dtype) or dtype.kind in 'Mm':
+            return 'datetime'
+        return 'text'
+
+    def fingerprint(self, df, summary):
+        """
+        Stable key for a dataset: column names and dtype kinds in order, the row count's
+        order of magnitude, and the magnitude of each numeric column's mean, min and max
+        (from _prepare_dataframe_summary's statistics).
+        """
+        numeric = summary.get('statistics', {}).get('numeric', {})
+        key = {
+            'columns': [[str(column), self._dtype_kind(dtype)] for column, dtype in df.dtypes.items()],
+            'rows': self._magnitude(len(df)),
+            'numeric': {
+                str(column): [self._magnitude(stats.get(stat)) for stat in ('mean', 'min', 'max')]
+                for column, stats in sorted(numeric.items(), key=lambda item: str(item[0]))
+            },
+        }
+        raw = json.dumps(key, sort_keys=True)
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def get(self, fingerprint):
+        """Returns the cached plan, or None"""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT plan FROM analysis_plans WHERE fingerprint = ?", (fingerprint,)
+            ).fetchone()
+            if row:
+                self.hits += 1
+                return json.loads(row[0])
+            self.misses += 1
+            return None
+
+    def set(self, fingerprint, plan, columns):
+        """Stores (or replaces) the plan for a fingerprint"""
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO analysis_plans (fingerprint, plan, columns, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                (fingerprint, json.dumps(plan), json.dumps([str(c) for c in columns]),
+                 datetime.now(timezone.utc).isoformat())
+            )
+            self._connection.commit()
+
+    def stats(self):
+        """Returns entry count and hit/miss counters"""
+        with self._lock:
+            size = self._connection.execute("SELECT COUNT(*) FROM analysis_plans").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            'size': size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+        }
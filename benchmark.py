@@ -0,0 +1,270 @@
+"""
+AI Path Benchmark
+Times product normalization, insight generation and custom analysis end to end against
+the fake LLM backend and an in-memory Supabase stand-in, so concurrency and caching
+changes can be compared run to run without network access.
+
+    python benchmark.py --products 500 --latency 0.5 --error-rate 0.05
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+import warnings
+from datetime import datetime, timedelta, timezone
+
+# The fake backend is selected before any manager creates its clients
+os.environ['LLM_BACKEND'] = 'fake'
+os.environ.setdefault('SUPABASE_URL', 'http://localhost:54321')
+os.environ.setdefault('SERVICE_ROLE_KEY', 'benchmark')
+os.environ.pop('ADMIN_USER', None)
+
+import numpy as np
+import pandas as pd
+
+import clients
+from rate_limiter import RateLimiter
+
+
+class InMemoryQuery:
+    """Chainable stand-in for a postgrest query: supports the filters the AI paths use"""
+
+    def __init__(self, store, table):
+        self.store = store
+        self.table = table
+        self.filters = []
+        self.row_limit = None
+        self.write = None
+        self.count = None
+        self.sort = None
+
+    def select(self, *columns, count=None, **kwargs):
+        self.count = count
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def gte(self, column, value):
+        self.filters.append(lambda row: str(row.get(column) or '') >= value)
+        return self
+
+    def in_(self, column, values):
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def order(self, column, desc=False, **kwargs):
+        self.sort = (column, desc)
+        return self
+
+    def limit(self, count):
+        self.row_limit = count
+        return self
+
+    def update(self, values, **kwargs):
+        self.write = ('update', values)
+        return self
+
+    def upsert(self, rows, **kwargs):
+        self.write = ('upsert', rows if isinstance(rows, list) else [rows])
+        return self
+
+    def insert(self, rows, **kwargs):
+        return self.upsert(rows)
+
+    def execute(self):
+        rows = self.store.setdefault(self.table, [])
+        if self.write and self.write[0] == 'upsert':
+            by_id = {row.get('id'): row for row in rows}
+            for new_row in self.write[1]:
+                if new_row.get('id') in by_id:
+                    by_id[new_row['id']].update(new_row)
+                else:
+                    rows.append(dict(new_row))
+            return type('Response', (), {'data': []})()
+
+        matched = [row for row in rows if all(check(row) for check in self.filters)]
+        if self.write:
+            for row in matched:
+                row.update(self.write[1])
+        total = len(matched) if self.count else None
+        if self.sort:
+            column, desc = self.sort
+            matched = sorted(matched, key=lambda row: str(row.get(column) or ''), reverse=desc)
+        if self.row_limit is not None:
+            matched = matched[:self.row_limit]
+        return type('Response', (), {'data': [dict(row) for row in matched], 'count': total})()
+
+
+class InMemorySupabase:
+    def __init__(self, tables):
+        self.tables = tables
+
+    def table(self, name):
+        return InMemoryQuery(self.tables, name)
+
+    def rpc(self, *args, **kwargs):
+        raise RuntimeError("RPC is not available in the benchmark store")
+
+
+PRODUCT_WORDS = ['solar', 'panel', 'inverter', 'battery', 'bulb', 'cake', 'shoes', 'phone', 'widget',
+                 'gadget', 'kettle', 'blender', 'gizmo', 'lantern', 'sprocket', 'doohickey', 'trinket']
+
+
+def synthetic_products(count, rng):
+    products = []
+    for _ in range(count):
+        words = rng.sample(PRODUCT_WORDS, 2)
+        products.append({
+            'id': str(uuid.uuid4()),
+            'name': f"{rng.randint(1, 500)}W {words[0].title()} {words[1].title()}",
+            'description': f"Quality {words[0]} {words[1]} for home use",
+            'category': rng.choice(['Electronics', 'Home', 'Food', 'Energy']),
+            'business_id': str(uuid.uuid4()),
+            'ai_name': None,
+            'ai_name_updated_at': None,
+        })
+    return products
+
+
+def synthetic_table_rows(count, rng):
+    now = datetime.now(timezone.utc)
+    return [{
+        'id': str(uuid.uuid4()),
+        'business_id': str(uuid.uuid4()),
+        'user_id': str(uuid.uuid4()),
+        'amount': round(rng.uniform(5, 500), 2),
+        'status': rng.choice(['paid', 'pending', 'failed']),
+        'created_at': (now - timedelta(hours=rng.randint(0, 24 * 30))).isoformat(),
+    } for _ in range(count)]
+
+
+def synthetic_upload(rows, seed):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'date': pd.date_range('2024-01-01', periods=rows, freq='h').strftime('%Y-%m-%d %H:%M'),
+        'region': rng.choice(['North', 'South', 'East', 'West'], rows),
+        'unit_price': rng.uniform(1, 100, rows).round(2),
+        'quantity': rng.integers(1, 20, rows),
+    })
+
+
+@contextlib.contextmanager
+def quiet(enabled):
+    """Silences the managers' progress prints unless --verbose"""
+    if not enabled:
+        yield
+        return
+    with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        yield
+
+
+def timed(name, func, items, fake_client):
+    calls_before, errors_before = fake_client.calls, fake_client.errors
+    started_at = time.perf_counter()
+    func()
+    seconds = time.perf_counter() - started_at
+    return {
+        'scenario': name,
+        'items': items,
+        'seconds': seconds,
+        'items_per_second': items / seconds if seconds else float('inf'),
+        'llm_calls': fake_client.calls - calls_before,
+        'llm_errors': fake_client.errors - errors_before,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=300, help='products to normalize')
+    parser.add_argument('--table-rows', type=int, default=500, help='rows per insight table')
+    parser.add_argument('--uploads', type=int, default=5, help='custom analysis runs (repeats hit the plan cache)')
+    parser.add_argument('--upload-rows', type=int, default=5000, help='rows per custom analysis upload')
+    parser.add_argument('--latency', type=float, default=0.5, help='mean fake LLM latency in seconds')
+    parser.add_argument('--jitter', type=float, default=0.1, help='fake LLM latency jitter in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='probability of a retryable fake LLM error')
+    parser.add_argument('--requests-per-minute', type=int, default=None, help='override the OpenAI request budget')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--only', choices=['normalization', 'insights', 'custom_analysis'], action='append')
+    parser.add_argument('--verbose', action='store_true', help="show the managers' own output")
+    args = parser.parse_args(argv)
+
+    fake_client = clients.open_ai_client.client
+    fake_client.latency = args.latency
+    fake_client.jitter = args.jitter
+    fake_client.error_rate = args.error_rate
+
+    # Fresh persistent caches per run, so results do not depend on earlier runs
+    workdir = tempfile.TemporaryDirectory(prefix='inxource-benchmark-')
+    clients.settings_manager.classification_cache_path = os.path.join(workdir.name, 'classification.sqlite3')
+    clients.settings_manager.analysis_plan_cache_path = os.path.join(workdir.name, 'plans.sqlite3')
+
+    with quiet(not args.verbose):
+        from products import Products
+        from analysis import AnalAI
+        products_manager = Products()
+        ai_manager = AnalAI()
+
+    if args.requests_per_minute:
+        limiter = RateLimiter(args.requests_per_minute, clients.settings_manager.open_ai_tokens_per_minute)
+        products_manager.open_ai_limiter = limiter
+        ai_manager.open_ai_limiter = limiter
+
+    rng = random.Random(args.seed)
+    store = InMemorySupabase({'products': synthetic_products(args.products, rng)})
+    for table in ai_manager.tables:
+        store.tables[table] = synthetic_table_rows(args.table_rows, rng)
+    products_manager.supabase_client = store
+    ai_manager.supabase_client = store
+
+    scenarios = args.only or ['normalization', 'insights', 'custom_analysis']
+    results = []
+
+    if 'normalization' in scenarios:
+        with quiet(not args.verbose):
+            results.append(timed('normalization', products_manager.normalize_new_products,
+                                 args.products, fake_client))
+
+    if 'insights' in scenarios:
+        with quiet(not args.verbose):
+            results.append(timed('insights (weekly)', ai_manager.generate_weekly_insights,
+                                 len(ai_manager.tables), fake_client))
+
+    if 'custom_analysis' in scenarios:
+        upload = synthetic_upload(args.upload_rows, args.seed)
+
+        def run_uploads():
+            for _ in range(args.uploads):
+                df = ai_manager.clean_all(upload.copy())
+                plan = ai_manager.plan_analysis(df)
+                for i, analysis in enumerate(plan.get('analyses', [])):
+                    ai_manager.build_chart(df, analysis, i + 1)
+
+        with quiet(not args.verbose):
+            results.append(timed('custom analysis', run_uploads, args.uploads, fake_client))
+
+    print(f"Fake LLM: latency {args.latency}s ± {args.jitter}s, error rate {args.error_rate:.0%}")
+    print(f"{'scenario':<20} {'items':>7} {'seconds':>9} {'items/s':>9} {'llm calls':>10} {'errors':>7}")
+    for result in results:
+        print(f"{result['scenario']:<20} {result['items']:>7} {result['seconds']:>9.2f} "
+              f"{result['items_per_second']:>9.2f} {result['llm_calls']:>10} {result['llm_errors']:>7}")
+
+    print(f"\n{'feature':<22} {'calls':>6} {'tokens':>8} {'p50 s':>7} {'p95 s':>7} {'cache hit':>9}")
+    for feature, stats in clients.llm_metrics.summary()['features'].items():
+        hit_rate = f"{stats['cache_hit_rate']:.0%}" if stats['cache_hit_rate'] is not None else '-'
+        print(f"{feature:<22} {stats['calls']:>6} {stats['total_tokens']:>8} "
+              f"{stats['latency_p50_seconds'] or 0:>7.3f} {stats['latency_p95_seconds'] or 0:>7.3f} {hit_rate:>9}")
+
+    workdir.cleanup()
+    return results
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
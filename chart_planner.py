@@ -0,0 +1,132 @@
+"""
+Chart Planner Module
+Rule-based chart plans for custom analysis, in the same format as the AI plan
+"""
+import re
+
+import pandas as pd
+
+PRICE_PATTERN = re.compile(r'price|cost|rate|amount_per|unit_value', re.IGNORECASE)
+QUANTITY_PATTERN = re.compile(r'qty|quantity|units|count|pieces|volume', re.IGNORECASE)
+ID_PATTERN = re.compile(r'(^id$|_id$|^id_|uuid|code$|number$)', re.IGNORECASE)
+
+
+class HeuristicChartPlanner:
+    """
+    Picks 2-3 charts from column types alone, without calling a model:
+    - price and quantity columns -> derived total, summed per category (or over time)
+    - a date column and a numeric column -> line chart over time
+    - a low-cardinality text column -> pie chart of its values
+    Falls back to a bar chart of counts or a histogram so there is always a plan.
+    """
+
+    def __init__(self, max_categories=12, max_charts=3):
+        self.max_categories = max_categories
+        self.max_charts = max_charts
+
+    def _columns_by_role(self, df):
+        dates, numbers, categories = [], [], []
+        for column in df.columns:
+            series = df[column]
+            if pd.api.types.is_datetime64_any_dtype(series) or series.dtype.kind == 'M':
+                dates.append(column)
+            elif pd.api.types.is_bool_dtype(series):
+                continue
+            elif pd.api.types.is_numeric_dtype(series):
+                if not ID_PATTERN.search(str(column)):
+                    numbers.append(column)
+            elif series.dtype == object or isinstance(series.dtype, pd.CategoricalDtype) \
+                    or pd.api.types.is_string_dtype(series):
+                distinct = series.nunique(dropna=True)
+                if 2 <= distinct <= self.max_categories:
+                    categories.append(column)
+        return dates, numbers, categories
+
+    def _derived_total(self, df, numbers):
+        """(price column, quantity column, new column name) if the data has both, else None"""
+        price = next((c for c in numbers if PRICE_PATTERN.search(str(c))), None)
+        quantity = next((c for c in numbers if QUANTITY_PATTERN.search(str(c)) and c != price), None)
+        if not price or not quantity:
+            return None
+
+        name = 'total_value'
+        while name in df.columns:
+            name = f"{name}_calc"
+        return price, quantity, name
+
+    def plan(self, df):
+        """Returns {"analyses": [...]} for the DataFrame"""
+        dates, numbers, categories = self._columns_by_role(df)
+        analyses = []
+
+        derived = self._derived_total(df, numbers)
+        if derived:
+            price, quantity, total = derived
+            group_by = categories[0] if categories else None
+            calculated_column = {
+                'name': total,
+                'formula': f"{price} * {quantity}",
+                'columns_used': [price, quantity],
+            }
+            if group_by or dates:
+                analyses.append({
+                    'title': f"Total value by {group_by}" if group_by else "Total value over time",
+                    'description': f"{price} multiplied by {quantity}, summed per {group_by or 'date'}",
+                    'chart_type': 'bar' if group_by else 'line',
+                    'x_column': group_by or dates[0],
+                    'y_column': total,
+                    'group_by': group_by,
+                    'aggregation': 'sum',
+                    'calculated_column': calculated_column,
+                })
+            else:
+                # Nothing to put on an x axis: show how the totals are spread instead
+                analyses.append({
+                    'title': "Distribution of total value",
+                    'description': f"How {price} multiplied by {quantity} is spread across records",
+                    'chart_type': 'histogram',
+                    'x_column': total,
+                    'calculated_column': calculated_column,
+                })
+            numbers = [total] + numbers
+
+        # Skip when the derived total is already charted over time
+        if dates and numbers and not (derived and analyses[0]['chart_type'] == 'line'):
+            value = numbers[0]
+            analyses.append({
+                'title': f"{value} over time",
+                'description': f"How {value} changes across {dates[0]}",
+                'chart_type': 'line',
+                'x_column': dates[0],
+                'y_column': value,
+                'calculated_column': analyses[0]['calculated_column'] if derived else None,
+            })
+
+        if categories:
+            column = categories[0]
+            analyses.append({
+                'title': f"Share of {column}",
+                'description': f"Distribution of records across {column} values",
+                'chart_type': 'pie',
+                'group_by': column,
+                'aggregation': 'count',
+            })
+
+        if not analyses and numbers:
+            analyses.append({
+                'title': f"Distribution of {numbers[0]}",
+                'description': f"How {numbers[0]} values are spread",
+                'chart_type': 'histogram',
+                'x_column': numbers[0],
+            })
+        elif not analyses and len(df.columns):
+            column = df.columns[0]
+            analyses.append({
+                'title': f"Records by {column}",
+                'description': f"Number of records for each {column}",
+                'chart_type': 'bar',
+                'group_by': column,
+                'aggregation': 'count',
+            })
+
+        return {'analyses': analyses[:self.max_charts]}
@@ -0,0 +1,84 @@
+"""
+Classification Cache Module
+Persistent SQLite cache of AI product types keyed by a fingerprint of the product text
+"""
+import hashlib
+import re
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+
+class ClassificationCache:
+    """
+    Maps a normalized (name, category, description prefix) fingerprint to the
+    product type the AI returned, so repeated listings are resolved locally.
+    """
+
+    TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+    def __init__(self, path, description_prefix=60):
+        self.path = path
+        self.description_prefix = description_prefix
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS product_types (
+                fingerprint TEXT PRIMARY KEY,
+                product_type TEXT NOT NULL,
+                sample_name TEXT,
+                created_at TEXT NOT NULL
+            )
+            """
+        )
+        self._connection.commit()
+
+    def fingerprint(self, name, category, description):
+        """
+        Stable key for near-identical listings: name words are lower-cased and sorted
+        so '200Ah Battery' and 'battery 200ah' collide; only a prefix of the description counts.
+        """
+        name_key = ' '.join(sorted(self.TOKEN_PATTERN.findall((name or '').lower())))
+        category_key = ' '.join(self.TOKEN_PATTERN.findall((category or '').lower()))
+        description_key = ' '.join(self.TOKEN_PATTERN.findall((description or '').lower()[:self.description_prefix]))
+        raw = f"{name_key}|{category_key}|{description_key}"
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def get(self, name, category, description):
+        """Returns the cached product type, or None"""
+        key = self.fingerprint(name, category, description)
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT product_type FROM product_types WHERE fingerprint = ?", (key,)
+            ).fetchone()
+            if row:
+                self.hits += 1
+                return row[0]
+            self.misses += 1
+            return None
+
+    def set(self, name, category, description, product_type):
+        """Stores (or replaces) the product type for a listing"""
+        key = self.fingerprint(name, category, description)
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO product_types (fingerprint, product_type, sample_name, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, product_type, name, datetime.now(timezone.utc).isoformat())
+            )
+            self._connection.commit()
+
+    def stats(self):
+        """Returns entry count and hit/miss counters"""
+        with self._lock:
+            size = self._connection.execute("SELECT COUNT(*) FROM product_types").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            'size': size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+        }
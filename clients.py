@@ -3,14 +3,36 @@ from dotenv import load_dotenv
 import os
 from datetime import datetime, timedelta
 from collections import defaultdict
-from openai import OpenAI
 
 from settings import SettingsManager
+from rate_limiter import RateLimiter
+from llm_backend import create_llm_client
+from llm_metrics import LLMMetrics, MeteredLLMClient
 settings_manager = SettingsManager()
 
 load_dotenv()  # loads the .env file
 api_key = os.getenv('OPEN_AI_TEST_KEY')
 
+# One budget for the whole process, shared by every manager that calls OpenAI
+open_ai_rate_limiter = RateLimiter(
+    requests_per_minute=settings_manager.open_ai_requests_per_minute,
+    tokens_per_minute=settings_manager.open_ai_tokens_per_minute
+)
+
+# Tokens, latency and cost of every LLM call, by calling feature
+llm_metrics = LLMMetrics(prices_per_million=settings_manager.llm_prices_per_million)
+
+# Chat client for the configured backend ('openai', or 'fake' for offline runs and benchmarks)
+open_ai_client = MeteredLLMClient(
+    create_llm_client(
+        settings_manager.llm_backend,
+        api_key=api_key,
+        fake_latency=settings_manager.fake_llm_latency_seconds,
+        fake_error_rate=settings_manager.fake_llm_error_rate
+    ),
+    llm_metrics
+)
+
 class Clients:
     def __init__(self) -> None:
         self.supabase_url = os.getenv('SUPABASE_URL')
@@ -21,7 +43,9 @@ class Clients:
 
         self.supabase_client: Client = create_client(self.supabase_url, self.supabase_service_role_key) 
 
-        self.open_ai_client = OpenAI(api_key=api_key)
+        self.open_ai_client = open_ai_client
+        self.open_ai_limiter = open_ai_rate_limiter
+        self.llm_metrics = llm_metrics
         
         # Load admin user and their business IDs
         self.admin_user_id = os.getenv('ADMIN_USER')
@@ -0,0 +1,125 @@
+"""
+Column Profiler Module
+Decides the type of each uploaded column (empty / date / numeric / text) and converts it.
+Only depends on pandas and numpy, so process-pool workers can import it without loading the app.
+"""
+import warnings
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+
+def profile_column_task(series: pd.Series, sample_rows: int) -> dict:
+    """Process-pool entry point: profiles one column (the Series is pickled to the worker and back)."""
+    return ColumnProfiler(sample_rows).profile_column(series)
+
+
+class ColumnProfiler:
+    """Infers column types on a bounded sample and runs only the chosen conversion on the full column"""
+
+    # Tried in order when inferring a date column's format; formats guessed from the data are added after
+    DATE_FORMATS = ['ISO8601', '%d/%m/%Y', '%d/%m/%Y %H:%M', '%d/%m/%Y %H:%M:%S', '%d-%m-%Y', '%d.%m.%Y',
+                    '%m/%d/%Y', '%m/%d/%Y %H:%M', '%d %b %Y', '%d %B %Y', '%b %d, %Y', '%Y/%m/%d']
+
+    def __init__(self, sample_rows: int = 1000):
+        self.sample_rows = sample_rows
+
+    @staticmethod
+    def strip_text(series: pd.Series) -> pd.Series:
+        """Strips whitespace from string values and turns empty strings into NaN, leaving NaN as NaN."""
+        stripped = series.str.strip()
+        # .str gives NaN for non-string values (e.g. numbers in a mixed Excel column); keep them as text
+        others = stripped.isna() & series.notna()
+        if others.any():
+            stripped[others] = series[others].astype(str).str.strip()
+        return stripped.replace('', np.nan)
+
+    @staticmethod
+    def keep_backend(original: pd.Series, converted: pd.Series) -> pd.Series:
+        """Arrow-backed input (settings.keep_arrow_dtypes) stays Arrow-backed after conversion."""
+        if isinstance(original.dtype, pd.ArrowDtype):
+            return converted.convert_dtypes(dtype_backend='pyarrow')
+        return converted
+
+    @classmethod
+    def parse_dates(cls, series: pd.Series, date_format: str = None) -> pd.Series:
+        """Converts a text column to datetime with an explicit format; unparseable values become NaT."""
+        if date_format is None:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', UserWarning)
+                return cls.keep_backend(series, pd.to_datetime(series, errors='coerce', dayfirst=True))
+        return cls.keep_backend(series, pd.to_datetime(series, errors='coerce', format=date_format))
+
+    @classmethod
+    def parse_numbers(cls, series: pd.Series) -> pd.Series:
+        """Converts a text column to numbers; unparseable values become NaN."""
+        if isinstance(series.dtype, pd.ArrowDtype):
+            # to_numeric on Arrow strings yields NaN that notna() counts as valid; parse via StringDtype
+            return cls.keep_backend(series, pd.to_numeric(series.astype('string[pyarrow]'), errors='coerce'))
+        return pd.to_numeric(series, errors='coerce')
+
+    def sample(self, text: pd.Series) -> pd.Series:
+        """Bounded random sample of a column's non-null values, used for type inference."""
+        values = text.dropna()
+        if len(values) > self.sample_rows:
+            values = values.sample(self.sample_rows, random_state=0)
+        return values
+
+    @classmethod
+    def infer_date_format(cls, sample: pd.Series) -> tuple[str, float]:
+        """
+        Picks the date format that parses most of the sample.
+        Returns (format, share of the sample parsed); format is None when nothing parses.
+        """
+        candidates = list(cls.DATE_FORMATS)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)
+            for value in sample.head(5):
+                guessed = guess_datetime_format(str(value), dayfirst=True)
+                if guessed and guessed not in candidates:
+                    candidates.append(guessed)
+
+        best_format, best_ratio = None, 0.0
+        for date_format in candidates:
+            ratio = cls.parse_dates(sample, date_format).notna().mean()
+            if ratio > best_ratio:
+                best_format, best_ratio = date_format, ratio
+            if ratio == 1.0:
+                break
+        return best_format, best_ratio
+
+    def profile_column(self, series: pd.Series) -> dict:
+        """
+        Decides a column's type once: 'empty', 'date', 'numeric' or 'text'.
+        Types are inferred on a random sample; only the chosen conversion runs on the
+        full column. Returns {'kind', 'text', 'values', 'date_format'}: the stripped text
+        (for string columns), the converted values the later stages reuse and, for dates,
+        the explicit format they were parsed with.
+        """
+        if series.isna().all():
+            return {'kind': 'empty', 'text': None, 'values': series, 'date_format': None}
+
+        # dtype.kind also catches Arrow-backed timestamps (Parquet / Arrow uploads)
+        if pd.api.types.is_datetime64_any_dtype(series) or series.dtype.kind == 'M':
+            return {'kind': 'date', 'text': None, 'values': series, 'date_format': None}
+
+        if not (pd.api.types.is_string_dtype(series) or pd.api.types.is_object_dtype(series)):
+            kind = 'numeric' if pd.api.types.is_numeric_dtype(series) else 'text'
+            return {'kind': kind, 'text': None, 'values': series, 'date_format': None}
+
+        text = self.strip_text(series)
+        sample = self.sample(text)
+        filled = text.notna().mean()
+
+        # Only very obvious dates (95% of all rows parse)
+        date_format, parsed = self.infer_date_format(sample)
+        if date_format and parsed * filled > 0.95:
+            return {'kind': 'date', 'text': None, 'values': self.parse_dates(text, date_format),
+                    'date_format': date_format}
+
+        # Numbers stored as text (90% of the non-null values parse)
+        if len(sample) and self.parse_numbers(sample).notna().mean() > 0.9:
+            return {'kind': 'numeric', 'text': text, 'values': self.parse_numbers(text), 'date_format': None}
+
+        return {'kind': 'text', 'text': text, 'values': text, 'date_format': None}
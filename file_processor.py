@@ -9,13 +9,16 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from collections import Counter
 import unicodedata
-from itertools import combinations
+from itertools import combinations, repeat
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 
 from openai import OpenAI
 from clients import Clients
+from column_profiler import ColumnProfiler, profile_column_task
 
 
 from businesses import Businesses
@@ -30,6 +33,18 @@ business_manager = Businesses()
 settings_manager = SettingsManager()
 
 
+def _pool_context():
+    """
+    Start method for the column-profiling pool: forkserver where the platform has it, else spawn.
+    Workers never fork this (multithreaded) process; they preload only column_profiler.
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload(['column_profiler'])
+        return context
+    return multiprocessing.get_context('spawn')
+
+
 
 class FileCleaner(Clients):
     """Manages the user's data in the inXource platform with minimal cleaning for AI analysis"""
@@ -37,58 +52,82 @@ class FileCleaner(Clients):
     def __init__(self):
         super().__init__()
 
-    def detect_dates(self, df: pd.DataFrame) -> tuple[pd.DataFrame, list]:
+    @staticmethod
+    def profile_column(series: pd.Series) -> dict:
+        """Profiles one column with the configured sample size (see ColumnProfiler.profile_column)."""
+        return ColumnProfiler(settings_manager.type_inference_sample_rows).profile_column(series)
+
+    def _use_process_pool(self, df: pd.DataFrame) -> bool:
+        """Only wide, large files are worth starting workers for (settings.parallel_clean_*)."""
+        return (settings_manager.parallel_cleaning
+                and (os.cpu_count() or 1) > 1
+                and len(df.columns) >= settings_manager.parallel_clean_min_columns
+                and df.size >= settings_manager.parallel_clean_min_cells)
+
+    def profile_columns(self, df: pd.DataFrame) -> dict:
+        """
+        Profiles every column once; clean_all passes the result to each stage.
+        Wide files are profiled across a process pool, one column per task.
+        """
+        if not self._use_process_pool(df):
+            return {col: self.profile_column(df[col]) for col in df.columns}
+
+        workers = min(settings_manager.parallel_clean_workers or os.cpu_count(), len(df.columns))
+        print(f"Profiling {len(df.columns)} columns across {workers} processes")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context()) as executor:
+            profiles = executor.map(profile_column_task, (df[col] for col in df.columns),
+                                    repeat(settings_manager.type_inference_sample_rows),
+                                    chunksize=max(1, len(df.columns) // (workers * 4)))
+            return dict(zip(df.columns, profiles))
+
+    def detect_dates(self, df: pd.DataFrame, profile: dict = None) -> tuple[pd.DataFrame, list]:
         """Detects obvious date columns and converts them to datetime."""
+        profile = profile or self.profile_columns(df)
         date_cols = []
         for col in df.columns:
-            # Only convert if it's very obviously dates (95% success rate)
-            if pd.api.types.is_string_dtype(df[col]) or pd.api.types.is_object_dtype(df[col]):
-                converted = pd.to_datetime(df[col], errors='coerce', dayfirst=True)
-                if converted.notna().sum() / len(df) > 0.95:
-                    df[col] = converted
-                    date_cols.append(col)
+            column_profile = profile.get(col)
+            if column_profile and column_profile['kind'] == 'date':
+                if not pd.api.types.is_datetime64_any_dtype(df[col]):
+                    df[col] = column_profile['values']
+                date_cols.append(col)
         return df, date_cols
 
-    def light_cleaning(self, df: pd.DataFrame) -> pd.DataFrame:
+    def light_cleaning(self, df: pd.DataFrame, profile: dict = None) -> pd.DataFrame:
         """Very light cleaning - just basic standardization without removing data."""
-        df, date_cols = self.detect_dates(df)
+        profile = profile or self.profile_columns(df)
+        df, date_cols = self.detect_dates(df, profile)
 
         # Only do very basic string cleanup - preserve the actual content
         for col in df.columns:
-            if col not in date_cols and (pd.api.types.is_string_dtype(df[col]) or df[col].dtype == 'object'):
-                # Just strip whitespace, don't change case or remove characters
-                df[col] = df[col].astype(str).str.strip()
-                # Replace empty strings with NaN for consistency
-                df[col] = df[col].replace('', np.nan)
+            column_profile = profile.get(col)
+            if col not in date_cols and column_profile and column_profile['text'] is not None:
+                # Stripped whitespace, empty strings as NaN (computed once by the profiler)
+                df[col] = column_profile['text']
 
         return df
 
-    def handle_only_extreme_missing(self, df: pd.DataFrame) -> pd.DataFrame:
+    def handle_only_extreme_missing(self, df: pd.DataFrame, profile: dict = None) -> pd.DataFrame:
         """
         Only handle completely empty columns or columns with 95%+ missing data.
         For AI analysis, we want to preserve as much data as possible.
         """
-        df, date_cols = self.detect_dates(df)
+        profile = profile or self.profile_columns(df)
 
-        for col in df.columns:
+        for col in list(df.columns):
             missing_ratio = pd.isna(df[col]).mean()
+            kind = profile[col]['kind'] if col in profile else None
             
             # Only drop if 95% or more is missing
             if missing_ratio >= 0.95:
                 df.drop(columns=[col], inplace=True)
                 print(f"Dropped column '{col}' - {missing_ratio:.1%} missing data")
-            else:
-                # For columns with some missing data, just fill strategically
-                if col in date_cols or pd.api.types.is_datetime64_any_dtype(df[col]):
-                    # For dates, keep NaT as is - AI can handle it
-                    continue
-                elif pd.api.types.is_numeric_dtype(df[col]):
-                    # Keep NaN as is for numeric - AI can handle it
-                    continue
-                else:
-                    # For text, only fill if there are just a few missing values
-                    if missing_ratio < 0.1:  # Less than 10% missing
-                        df[col].fillna('Unknown', inplace=True)
+            elif kind in ('date', 'numeric') or pd.api.types.is_datetime64_any_dtype(df[col]) \
+                    or pd.api.types.is_numeric_dtype(df[col]):
+                # Keep NaT/NaN as is for dates and numbers - AI can handle it
+                continue
+            elif missing_ratio < 0.1:
+                # For text, only fill if there are just a few missing values (less than 10%)
+                df[col] = df[col].fillna('Unknown')
 
         return df
 
@@ -101,27 +140,23 @@ class FileCleaner(Clients):
             print(f"Removed {removed} exact duplicate rows")
         return df
 
-    def preserve_data_types(self, df: pd.DataFrame) -> pd.DataFrame:
+    def preserve_data_types(self, df: pd.DataFrame, profile: dict = None) -> pd.DataFrame:
         """
         Light data type optimization without losing information.
         Only converts obviously numeric columns that are stored as strings.
         """
-        df, date_cols = self.detect_dates(df)
+        profile = profile or self.profile_columns(df)
 
         for col in df.columns:
-            if col in date_cols:
+            column_profile = profile.get(col)
+            if not column_profile or column_profile['kind'] != 'numeric':
                 continue
 
             # Only convert if it's clearly numeric but stored as string
-            if pd.api.types.is_string_dtype(df[col]):
-                # Try to convert to numeric, but only if most values are numeric
-                numeric_converted = pd.to_numeric(df[col], errors='coerce')
-                non_null_ratio = numeric_converted.notna().sum() / df[col].notna().sum()
-                
-                # Only convert if 90%+ of non-null values are numeric
-                if non_null_ratio > 0.9:
-                    df[col] = numeric_converted
-                    print(f"Converted '{col}' to numeric (was string)")
+            if pd.api.types.is_string_dtype(df[col]) or pd.api.types.is_object_dtype(df[col]):
+                # Reuse the profiler's conversion; assignment aligns it to the remaining rows
+                df[col] = column_profile['values']
+                print(f"Converted '{col}' to numeric (was string)")
 
         return df
 
@@ -148,6 +183,37 @@ class FileCleaner(Clients):
 
         return df
 
+    def compact_dtypes(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Shrinks the cleaned DataFrame without changing its values: integers are downcast
+        to the smallest type that fits, floats to float32 only when that is lossless, and
+        text columns with few distinct values (settings.category_max_unique_ratio) become
+        'category'. Reports memory before and after.
+        """
+        before = df.memory_usage(deep=True).sum()
+        max_ratio = settings_manager.category_max_unique_ratio
+
+        for col in df.columns:
+            series = df[col]
+            # Arrow-backed columns (settings.keep_arrow_dtypes) are already compact
+            if pd.api.types.is_bool_dtype(series) or isinstance(series.dtype, pd.ArrowDtype):
+                continue
+            if pd.api.types.is_integer_dtype(series):
+                df[col] = pd.to_numeric(series, downcast='integer')
+            elif pd.api.types.is_float_dtype(series):
+                smaller = series.astype('float32')
+                if ((smaller.astype(series.dtype) == series) | series.isna()).all():
+                    df[col] = smaller
+            elif pd.api.types.is_object_dtype(series) and len(series):
+                # Only plain-string columns; mixed columns stay as they are
+                if pd.api.types.infer_dtype(series, skipna=True) == 'string' \
+                        and series.nunique(dropna=True) <= max_ratio * len(series):
+                    df[col] = series.astype('category')
+
+        after = df.memory_usage(deep=True).sum()
+        print(f"Compacted dtypes: {before / 1024 / 1024:.2f} MB -> {after / 1024 / 1024:.2f} MB")
+        return df
+
     def clean_all(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Minimal cleaning approach optimized for AI analysis.
@@ -155,14 +221,19 @@ class FileCleaner(Clients):
         """
         print("Starting minimal data cleaning for AI analysis...")
         print(f"Original dataset: {len(df)} rows × {len(df.columns)} columns")
+
+        # 0. Decide every column's type once; the stages below reuse the conversions
+        profile = self.profile_columns(df)
+        kinds = Counter(column_profile['kind'] for column_profile in profile.values())
+        print(f"\n0. Profiled columns: {dict(kinds)}")
         
         # 1. Very light cleaning
         print("\n1. Basic cleaning (whitespace, empty strings)...")
-        df = self.light_cleaning(df)
+        df = self.light_cleaning(df, profile)
 
         # 2. Only handle extreme missing data
         print("2. Handling only extreme missing data (95%+ missing)...")
-        df = self.handle_only_extreme_missing(df)
+        df = self.handle_only_extreme_missing(df, profile)
 
         # 3. Remove exact duplicates only
         print("3. Removing exact duplicate rows...")
@@ -170,14 +241,111 @@ class FileCleaner(Clients):
 
         # 4. Light data type optimization
         print("4. Basic data type optimization...")
-        df = self.preserve_data_types(df)
+        df = self.preserve_data_types(df, profile)
 
         # 5. Final check
         print("5. Final validation...")
         df = self.final_check(df)
 
+        # 6. Compact dtypes for the group-bys downstream
+        print("6. Compacting dtypes...")
+        df = self.compact_dtypes(df)
+
         print(f"\n✓ Cleaning completed!")
         print(f"Final dataset: {len(df)} rows × {len(df.columns)} columns")
         print("Dataset is ready for AI analysis with minimal data loss.")
         
-        return df
\ No newline at end of file
+        return df
+
+    def chunk_schema(self, df: pd.DataFrame) -> dict:
+        """
+        Fixes the cleaning decisions for a chunked CSV from its first chunk:
+        each column's kind, the columns to drop (95%+ missing) and the text
+        columns to fill with 'Unknown' (less than 10% missing).
+        """
+        profile = self.profile_columns(df)
+        missing = df.isna().mean() if len(df) else pd.Series(1.0, index=df.columns)
+        kinds = {col: column_profile['kind'] for col, column_profile in profile.items()}
+        return {
+            'kinds': kinds,
+            'date_formats': {col: column_profile['date_format'] for col, column_profile in profile.items()},
+            'drop': [col for col in df.columns if missing[col] >= 0.95],
+            'fill': [col for col in df.columns if kinds[col] == 'text' and missing[col] < 0.1],
+        }
+
+    def clean_chunk(self, chunk: pd.DataFrame, schema: dict) -> pd.DataFrame:
+        """Cleans one chunk with the decisions in `schema` (no per-chunk inference)."""
+        chunk = chunk.drop(columns=[col for col in schema['drop'] if col in chunk.columns])
+
+        for col in chunk.columns:
+            kind = schema['kinds'].get(col, 'text')
+            series = chunk[col]
+            if not (pd.api.types.is_string_dtype(series) or pd.api.types.is_object_dtype(series)):
+                # pandas infers each chunk's dtypes on its own; keep them consistent with the schema
+                if kind == 'date' and series.isna().all():
+                    chunk[col] = pd.Series(pd.NaT, index=series.index, dtype='datetime64[ns]')
+                elif kind == 'text':
+                    chunk[col] = series.astype(object).where(series.isna(), series.astype(str))
+                continue
+            text = ColumnProfiler.strip_text(series)
+            if kind == 'date':
+                # The first chunk's format, so every chunk parses the same way
+                chunk[col] = ColumnProfiler.parse_dates(text, schema['date_formats'].get(col))
+            elif kind == 'numeric':
+                chunk[col] = ColumnProfiler.parse_numbers(text)
+            elif col in schema['fill']:
+                chunk[col] = text.fillna('Unknown')
+            else:
+                chunk[col] = text
+
+        return chunk
+
+    def iter_clean_csv_chunks(self, source, chunk_rows: int = None):
+        """
+        Reads a CSV in chunks of `chunk_rows` and yields each chunk cleaned.
+        Types come from the first chunk; exact duplicates are removed across chunks
+        with a set of row hashes, so only one raw chunk is in memory at a time.
+        """
+        chunk_rows = chunk_rows or settings_manager.clean_chunk_rows
+        schema = None
+        seen = set()
+        rows_read = duplicates = 0
+
+        for chunk in pd.read_csv(source, chunksize=chunk_rows):
+            rows_read += len(chunk)
+            if schema is None:
+                schema = self.chunk_schema(chunk)
+                print(f"Chunked cleaning: {Counter(schema['kinds'].values())}, dropping {schema['drop']}")
+
+            chunk = self.clean_chunk(chunk, schema)
+
+            # Exact duplicates, within this chunk and against every earlier chunk
+            hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+            keep = ~pd.Series(hashes).duplicated().to_numpy()
+            keep &= np.fromiter((value not in seen for value in hashes), dtype=bool, count=len(hashes))
+            seen.update(hashes[keep].tolist())
+            duplicates += int((~keep).sum())
+
+            yield chunk[keep]
+
+        print(f"Chunked cleaning: read {rows_read} rows, removed {duplicates} exact duplicate rows")
+
+    def clean_csv_in_chunks(self, source, chunk_rows: int = None) -> pd.DataFrame:
+        """
+        Chunked counterpart of clean_all for large CSVs: the raw file is never held
+        in memory whole, only the cleaned (typed) chunks are kept.
+        """
+        chunks = list(self.iter_clean_csv_chunks(source, chunk_rows))
+        if not chunks:
+            return pd.DataFrame()
+        df = pd.concat(chunks, ignore_index=True)
+        del chunks
+        return self.compact_dtypes(self.final_check(df))
+
+    def write_clean_csv(self, source, output, chunk_rows: int = None) -> int:
+        """Cleans a CSV chunk by chunk and appends each chunk to `output`; returns the rows written."""
+        rows_written = 0
+        for i, chunk in enumerate(self.iter_clean_csv_chunks(source, chunk_rows)):
+            chunk.to_csv(output, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+            rows_written += len(chunk)
+        return rows_written
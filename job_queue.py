@@ -0,0 +1,121 @@
+"""
+Job Queue Module
+In-process background runner for long jobs (insight generation) with a pollable job table
+"""
+import threading
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+
+class JobQueue:
+    """
+    Runs submitted functions on background worker threads and keeps a job table
+    (queued / running / done / failed) that request handlers can poll.
+    The job function receives the Job so it can report stage and per-item progress.
+    """
+
+    def __init__(self, workers=1, keep_finished=50):
+        self.keep_finished = keep_finished
+        self._jobs = {}             # job id -> Job, in submission order
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job')
+
+    def submit(self, kind, func, *args, **kwargs):
+        """
+        Queues func(job, *args, **kwargs) and returns the job.
+        If a job of the same kind is already queued or running, that job is returned instead.
+        """
+        with self._lock:
+            for job in self._jobs.values():
+                if job.kind == kind and job.status in ('queued', 'running'):
+                    return job
+
+            job = Job(kind)
+            self._jobs[job.id] = job
+            self._prune()
+
+        self._executor.submit(self._run, job, func, args, kwargs)
+        return job
+
+    def _run(self, job, func, args, kwargs):
+        job._start()
+        try:
+            job._finish(result=func(job, *args, **kwargs))
+        except Exception as e:
+            traceback.print_exc()
+            job._finish(error=str(e))
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in ('done', 'failed')]
+        for job_id in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        """Returns the job, or None if it is unknown (or was pruned)"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def latest(self, kind):
+        """Returns the most recently submitted job of a kind, or None"""
+        with self._lock:
+            jobs = [job for job in self._jobs.values() if job.kind == kind]
+        return jobs[-1] if jobs else None
+
+
+class Job:
+    """One background job: status, current stage, per-item progress and result"""
+
+    def __init__(self, kind):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = 'queued'
+        self.stage = None
+        self.progress = {}          # item -> queued / running / done / failed
+        self.result = None
+        self.error = None
+        self.created_at = datetime.now(timezone.utc)
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def set_stage(self, stage):
+        with self._lock:
+            self.stage = stage
+
+    def set_progress(self, item, status):
+        with self._lock:
+            self.progress[item] = status
+
+    def _start(self):
+        with self._lock:
+            self.status = 'running'
+            self.started_at = datetime.now(timezone.utc)
+
+    def _finish(self, result=None, error=None):
+        with self._lock:
+            self.status = 'failed' if error else 'done'
+            self.result = result
+            self.error = error
+            self.finished_at = datetime.now(timezone.utc)
+
+    def to_dict(self):
+        """JSON-serializable view for status endpoints"""
+        with self._lock:
+            progress = dict(self.progress)
+            completed = sum(1 for status in progress.values() if status in ('done', 'failed'))
+            return {
+                'job_id': self.id,
+                'kind': self.kind,
+                'status': self.status,
+                'stage': self.stage,
+                'progress': progress,
+                'completed': completed,
+                'total': len(progress),
+                'result': self.result,
+                'error': self.error,
+                'created_at': self.created_at.isoformat(),
+                'started_at': self.started_at.isoformat() if self.started_at else None,
+                'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            }
@@ -0,0 +1,147 @@
+"""
+LLM Backend Module
+Selects the chat-completion backend: the real OpenAI client, or a local fake with
+template responses, configurable latency and injected errors (for offline runs and benchmarks)
+"""
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+
+import httpx
+from openai import APIConnectionError, APITimeoutError, OpenAI
+
+from rate_limiter import estimate_tokens
+
+
+class FakeChatCompletions:
+    """Implements chat.completions.create() with the same call shape and response attributes as OpenAI"""
+
+    def __init__(self, client):
+        self._client = client
+
+    def create(self, model, messages, **options):
+        return self._client.complete(model, messages, **options)
+
+
+class FakeLLMClient:
+    """
+    Drop-in for OpenAI(): exposes chat.completions.create() and returns template answers
+    for the prompts this app sends (product types, batched product types, insight
+    CONCERNS/RECOMMENDATIONS, custom analysis plans).
+
+    latency        - mean seconds per call; each call sleeps latency ± jitter
+    error_rate     - probability of raising APIConnectionError (retryable)
+    timeout_rate   - probability of raising APITimeoutError (retryable)
+    responses      - {substring: text} canned answers checked before the templates
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, timeout_rate=0.0, responses=None, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.responses = responses or {}
+        self.calls = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=FakeChatCompletions(self))
+
+    def _request(self):
+        return httpx.Request('POST', 'http://fake-llm.local/v1/chat/completions')
+
+    def complete(self, model, messages, **options):
+        with self._lock:
+            self.calls += 1
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            roll = self._random.random()
+
+        time.sleep(delay)
+        if roll < self.error_rate:
+            with self._lock:
+                self.errors += 1
+            raise APIConnectionError(request=self._request())
+        if roll < self.error_rate + self.timeout_rate:
+            with self._lock:
+                self.errors += 1
+            raise APITimeoutError(request=self._request())
+
+        prompt = '\n'.join(str(message.get('content') or '') for message in messages)
+        content = self.respond(prompt)
+        return SimpleNamespace(
+            id=f"fake-{uuid.uuid4().hex[:12]}",
+            model=model,
+            choices=[SimpleNamespace(index=0, finish_reason='stop',
+                                     message=SimpleNamespace(role='assistant', content=content))],
+            usage=SimpleNamespace(
+                prompt_tokens=estimate_tokens(prompt),
+                completion_tokens=estimate_tokens(content),
+                total_tokens=estimate_tokens(prompt) + estimate_tokens(content),
+            ),
+        )
+
+    def respond(self, prompt):
+        """Template answer for a prompt"""
+        for fragment, text in self.responses.items():
+            if fragment in prompt:
+                return text
+
+        if 'Product types (JSON)' in prompt:
+            names = re.findall(r'^(\d+)\. Product name: (.*?) \|', prompt, re.MULTILINE)
+            return json.dumps([{"i": int(i), "type": self._product_type(name)} for i, name in names])
+
+        if 'Product type:' in prompt:
+            match = re.search(r'Product name: (.*)', prompt)
+            return self._product_type(match.group(1) if match else '')
+
+        if '"analyses"' in prompt:
+            return json.dumps({"analyses": self._analysis_plan(prompt)})
+
+        if 'CONCERNS:' in prompt:
+            table = re.search(r'Main table for analysis: (\w+)', prompt)
+            table = table.group(1) if table else 'data'
+            return (f"CONCERNS:\n- Activity in {table} is concentrated in a few records.\n"
+                    f"- Some {table} values are missing.\n\n"
+                    f"RECOMMENDATIONS:\n- Follow up on the most active {table} segments.\n"
+                    f"- Improve data completeness for {table}.")
+
+        return "OK"
+
+    @staticmethod
+    def _product_type(name):
+        words = re.findall(r'[a-z]+', (name or '').lower())
+        words = [word for word in words if len(word) > 2]
+        return words[-1] if words else 'product'
+
+    @staticmethod
+    def _analysis_plan(prompt):
+        match = re.search(r'- Columns: (\[.*?\])', prompt)
+        try:
+            columns = json.loads(match.group(1).replace("'", '"')) if match else []
+        except json.JSONDecodeError:
+            columns = []
+        if not columns:
+            return []
+        return [{
+            "title": f"Records by {columns[0]}",
+            "description": f"Number of records for each {columns[0]}",
+            "chart_type": "bar",
+            "x_column": columns[0],
+            "group_by": columns[0],
+            "aggregation": "count",
+            "calculated_column": None,
+        }]
+
+
+def create_llm_client(backend, api_key=None, fake_latency=0.0, fake_error_rate=0.0):
+    """Returns the chat client for a backend name: 'openai' (default) or 'fake'"""
+    if backend == 'fake':
+        return FakeLLMClient(latency=fake_latency, error_rate=fake_error_rate)
+    if backend != 'openai':
+        raise ValueError(f"Unknown LLM backend: {backend}")
+    # No SDK retries: they would bypass the shared rate limiter, so call_with_retries does all retrying
+    return OpenAI(api_key=api_key, max_retries=0)
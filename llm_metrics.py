@@ -0,0 +1,121 @@
+"""
+LLM Metrics Module
+In-process registry of chat-completion calls (tokens, latency, cost, cache hits) per calling feature
+"""
+import threading
+import time
+from datetime import datetime, timezone
+from collections import defaultdict, deque
+from types import SimpleNamespace
+
+import numpy as np
+
+
+class LLMMetrics:
+    """
+    Aggregates every LLM call by feature: call and error counts, prompt/completion tokens,
+    estimated cost, cache hits/misses, and a rolling window of latencies for p50/p95.
+    """
+
+    def __init__(self, prices_per_million=None, latency_window=1000):
+        self.prices_per_million = prices_per_million or {}
+        self.latency_window = latency_window
+        self.started_at = datetime.now(timezone.utc)
+        self._features = defaultdict(self._empty)
+        self._lock = threading.Lock()
+
+    def _empty(self):
+        return {
+            'calls': 0,
+            'errors': 0,
+            'prompt_tokens': 0,
+            'completion_tokens': 0,
+            'cost_usd': 0.0,
+            'cache_hits': 0,
+            'cache_misses': 0,
+            'models': defaultdict(int),
+            'latencies': deque(maxlen=self.latency_window),
+        }
+
+    def _cost(self, model, prompt_tokens, completion_tokens):
+        prompt_price, completion_price = self.prices_per_million.get(model, (0.0, 0.0))
+        return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+    def record_call(self, feature, model, latency, prompt_tokens=0, completion_tokens=0, error=False):
+        with self._lock:
+            stats = self._features[feature]
+            stats['calls'] += 1
+            stats['errors'] += int(error)
+            stats['prompt_tokens'] += prompt_tokens
+            stats['completion_tokens'] += completion_tokens
+            stats['cost_usd'] += self._cost(model, prompt_tokens, completion_tokens)
+            stats['models'][model] += 1
+            stats['latencies'].append(latency)
+
+    def record_cache(self, feature, hit):
+        """Counts a cache lookup that stood in front of an LLM call"""
+        with self._lock:
+            self._features[feature]['cache_hits' if hit else 'cache_misses'] += 1
+
+    def summary(self):
+        """Per-feature totals with p50/p95 latency, plus overall totals"""
+        with self._lock:
+            features = {name: dict(stats, latencies=list(stats['latencies']), models=dict(stats['models']))
+                        for name, stats in self._features.items()}
+
+        report = {}
+        for name, stats in sorted(features.items()):
+            latencies = stats.pop('latencies')
+            lookups = stats['cache_hits'] + stats['cache_misses']
+            report[name] = {
+                **stats,
+                'total_tokens': stats['prompt_tokens'] + stats['completion_tokens'],
+                'cost_usd': round(stats['cost_usd'], 6),
+                'cache_hit_rate': round(stats['cache_hits'] / lookups, 4) if lookups else None,
+                'latency_total_seconds': round(float(np.sum(latencies)), 3) if latencies else 0.0,
+                'latency_p50_seconds': round(float(np.percentile(latencies, 50)), 3) if latencies else None,
+                'latency_p95_seconds': round(float(np.percentile(latencies, 95)), 3) if latencies else None,
+            }
+
+        return {
+            'since': self.started_at.isoformat(),
+            'features': report,
+            'totals': {
+                key: sum(stats[key] for stats in report.values())
+                for key in ('calls', 'errors', 'prompt_tokens', 'completion_tokens', 'total_tokens',
+                            'cost_usd', 'cache_hits', 'cache_misses')
+            },
+        }
+
+
+class MeteredCompletions:
+    def __init__(self, client, metrics):
+        self._client = client
+        self._metrics = metrics
+
+    def create(self, feature='unknown', **kwargs):
+        """chat.completions.create() with an extra `feature` label; records the call"""
+        model = kwargs.get('model', 'unknown')
+        started_at = time.perf_counter()
+        try:
+            response = self._client.chat.completions.create(**kwargs)
+        except Exception:
+            self._metrics.record_call(feature, model, time.perf_counter() - started_at, error=True)
+            raise
+
+        usage = getattr(response, 'usage', None)
+        self._metrics.record_call(
+            feature, model, time.perf_counter() - started_at,
+            prompt_tokens=getattr(usage, 'prompt_tokens', 0) or 0,
+            completion_tokens=getattr(usage, 'completion_tokens', 0) or 0,
+        )
+        return response
+
+
+class MeteredLLMClient:
+    """Wraps a chat client (OpenAI or the fake backend) so every completion is recorded in `metrics`"""
+
+    def __init__(self, client, metrics):
+        self.client = client
+        self.metrics = metrics
+        self.chat = SimpleNamespace(completions=MeteredCompletions(client, metrics))
@@ -1,4 +1,4 @@
-from flask import Flask, request, render_template, redirect, url_for, session, make_response, jsonify, flash
+from flask import Flask, request, render_template, redirect, url_for, session, make_response, jsonify, flash, Response, stream_with_context
 from datetime import datetime, timedelta
 from werkzeug.utils import secure_filename
 from typing import Dict, Any, cast
@@ -19,6 +19,8 @@ from subscriptions import Subscriptions
 from auth import Auth
 from activites import Activites
 from referrals import Referrals
+from typeahead import Typeahead
+from job_queue import JobQueue
 
 from clients import Clients
 
@@ -45,6 +47,8 @@ Subscription_manager = Subscriptions()
 auth_manager = Auth()
 activity_manager = Activites()
 referrals_manager = Referrals()
+typeahead_manager = Typeahead()
+insight_jobs = JobQueue(workers=settings_manager.insight_job_workers)
 
 # Configure logger with environment-based control
 LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
@@ -735,15 +739,28 @@ def search_product():
                 "error": "Please provide a product name to search"
             }), 400
         
+        # The query as typed wins; its spelling correction is only searched when it finds nothing
+        search_query, corrected_query, did_you_mean = products_manager.resolve_product_query(product_query)
+        if corrected_query:
+            logger.info(f"Product query '{product_query}' corrected to '{corrected_query}'")
+
         # Get product summary using your existing method
-        logger.info(f"Fetching product information summary for: {product_query}")
-        result = products_manager.product_information_summary(product_query)
+        logger.info(f"Fetching product information summary for: {search_query}")
+        result = products_manager.product_information_summary(search_query)
+
+        # Similar product types are only offered as suggestions, never counted in the summary
+        suggestions = [did_you_mean] if did_you_mean else []
+        if not result.get('product_business_number'):
+            suggestions += [s for s in products_manager.suggest_product_types(search_query) if s not in suggestions]
         
-        logger.info(f"Product search completed for: {product_query}")
+        logger.info(f"Product search completed for: {search_query}")
         # Return the summary data
         return jsonify({
             "success": True,
-            "product_name": product_query,
+            "product_name": search_query,
+            "original_query": product_query,
+            "corrected_query": corrected_query,
+            "suggestions": suggestions,
             "summary": result
         }), 200
         
@@ -757,6 +774,116 @@ def search_product():
 
 
 
+@app.route('/similar_products', methods=['GET', 'POST'])
+def similar_products():
+    """Returns products ranked by local TF-IDF similarity to the query"""
+
+    # Check if user is logged in
+    if not session.get('logged_in'):
+        return jsonify({"success": False, "message": "Please login to perform this action"})
+
+    # Check user role
+    user_role = session.get('role')
+    if user_role not in ['super', 'admin']:
+        logger.warning(f"Unauthorized approval attempt by user with role: {user_role}")
+        return jsonify({"success": False, "message": "You don't have permission to approve withdrawals"})
+
+    if request.method == 'POST':
+        product_query = request.form.get('query', '').strip()
+    else:
+        product_query = request.args.get('query', '').strip()
+
+    if not product_query:
+        return jsonify({"error": "Please provide a product name to search"}), 400
+
+    try:
+        logger.info(f"Similarity search requested for: {product_query}")
+        products = products_manager.similar_products(product_query)
+        return jsonify({
+            "success": True,
+            "query": product_query,
+            "products": products
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Error in similar_products: {str(e)}", exc_info=True)
+        return jsonify({"error": "An error occurred during search"}), 500
+
+
+@app.route('/product_clusters', methods=['GET'])
+def product_clusters():
+    """Returns groups of near-duplicate product listings across businesses"""
+
+    # Check if user is logged in
+    if not session.get('logged_in'):
+        return jsonify({"success": False, "message": "Please login to perform this action"})
+
+    # Check user role
+    user_role = session.get('role')
+    if user_role not in ['super', 'admin']:
+        logger.warning(f"Unauthorized approval attempt by user with role: {user_role}")
+        return jsonify({"success": False, "message": "You don't have permission to approve withdrawals"})
+
+    try:
+        cluster_id = request.args.get('cluster_id', '').strip()
+
+        if cluster_id:
+            logger.info(f"Cluster details requested for: {cluster_id}")
+            return jsonify({
+                "success": True,
+                "cluster_id": cluster_id,
+                "products": products_manager.cluster_products(cluster_id),
+                "business_count": products_manager.cluster_by_business(cluster_id),
+                "market_share": products_manager.cluster_market_share(cluster_id)
+            }), 200
+
+        min_size = request.args.get('min_size', 2, type=int)
+        clusters = products_manager.duplicate_product_clusters(min_size=min_size)
+        logger.info(f"Returning {len(clusters)} near-duplicate product clusters")
+        return jsonify({"success": True, "clusters": clusters}), 200
+
+    except Exception as e:
+        logger.error(f"Error in product_clusters: {str(e)}", exc_info=True)
+        return jsonify({"error": "An error occurred while clustering products"}), 500
+
+
+@app.route('/autocomplete', methods=['GET'])
+def autocomplete():
+    """Returns prefix suggestions for the product, business and industry search boxes"""
+
+    # Check if user is logged in
+    if not session.get('logged_in'):
+        return jsonify({"success": False, "message": "Please login to perform this action"})
+
+    # Check user role
+    user_role = session.get('role')
+    if user_role not in ['super', 'admin']:
+        logger.warning(f"Unauthorized autocomplete request by user with role: {user_role}")
+        return jsonify({"success": False, "message": "You don't have permission to search", "suggestions": []})
+
+    kind = request.args.get('type', 'products').strip().lower()
+    prefix = request.args.get('q', '').strip()
+
+    if kind not in Typeahead.KINDS:
+        return jsonify({
+            'success': False,
+            'message': f'Invalid type. Use one of: {", ".join(Typeahead.KINDS)}.',
+            'suggestions': []
+        }), 400
+
+    if not prefix:
+        return jsonify({'success': True, 'suggestions': []}), 200
+
+    try:
+        suggestions = typeahead_manager.suggest(kind, prefix)
+        return jsonify({'success': True, 'suggestions': suggestions}), 200
+
+    except Exception as e:
+        logger.error(f"Error in autocomplete for '{prefix}' ({kind}): {str(e)}", exc_info=True)
+        return jsonify({'success': False, 'suggestions': []}), 500
+
+
+
 @app.route('/industry_analysis')
 def industry_analysis():
 
@@ -1125,17 +1252,14 @@ def generate_weekly_insights():
         should_generate = True
     
     if should_generate:
-        logger.info("Generating new weekly insights (7+ days have passed or no previous insights)")
-        ai_manager.generate_weekly_insights()
-        data = ai_manager.weekly_insights
-        logger.info("Storing weekly report in database")
-        ai_manager.store_weekly_report(data)
-        logger.info("New weekly insights generated and stored successfully")
+        logger.info("Queueing new weekly insights (7+ days have passed or no previous insights)")
+        job = insight_jobs.submit('weekly_insights', run_insights_job, 'weekly')
         
         return jsonify({
             'success': True, 
-            'message': 'New weekly insights generated successfully',
-            'generated': True
+            'message': 'Weekly insights are being generated',
+            'generated': True,
+            'job_id': job.id
         })
     else:
         logger.info(f"Weekly insights are still valid. {7 - days_difference} days remaining")
@@ -1186,17 +1310,14 @@ def generate_monthly_insights():
         should_generate = True
     
     if should_generate:
-        logger.info("Generating new monthly insights (30+ days have passed or no previous insights)")
-        ai_manager.generate_monthly_insights()
-        data = ai_manager.monthly_insights
-        logger.info("Storing monthly report in database")
-        ai_manager.store_monthly_report(data)
-        logger.info("New monthly insights generated and stored successfully")
+        logger.info("Queueing new monthly insights (30+ days have passed or no previous insights)")
+        job = insight_jobs.submit('monthly_insights', run_insights_job, 'monthly')
         
         return jsonify({
             'success': True, 
-            'message': 'New monthly insights generated successfully',
-            'generated': True
+            'message': 'Monthly insights are being generated',
+            'generated': True,
+            'job_id': job.id
         })
     else:
         logger.info(f"Monthly insights are still valid. {30 - days_difference} days remaining")
@@ -1208,6 +1329,67 @@ def generate_monthly_insights():
         })
     
 
+def run_insights_job(job, period):
+    """Background job: generates the weekly or monthly insights and stores the report"""
+
+    def on_progress(table_name, status):
+        job.set_stage('generating')
+        job.set_progress(table_name, status)
+
+    job.set_stage('extracting')
+    if period == 'weekly':
+        data = ai_manager.generate_weekly_insights(on_progress=on_progress)
+        job.set_stage('storing')
+        logger.info("Storing weekly report in database")
+        ai_manager.store_weekly_report(data)
+    else:
+        data = ai_manager.generate_monthly_insights(on_progress=on_progress)
+        job.set_stage('storing')
+        logger.info("Storing monthly report in database")
+        ai_manager.store_monthly_report(data)
+
+    logger.info(f"New {period} insights generated and stored successfully")
+    return {'tables': len(data)}
+
+
+@app.route('/insights-job/<job_id>', methods=['GET'])
+def insights_job_status(job_id):
+    """Returns the status and per-table progress of an insight generation job"""
+
+    # Check if user is logged in
+    if not session.get('logged_in'):
+        return jsonify({"success": False, "message": "Please login to perform this action"})
+
+    # Check user role
+    user_role = session.get('role')
+    if user_role not in ['super', 'admin']:
+        logger.warning(f"Unauthorized insights job request by user with role: {user_role}")
+        return jsonify({"success": False, "message": "You don't have permission to view insights"})
+
+    job = insight_jobs.get(job_id)
+    if not job:
+        return jsonify({"success": False, "message": "Job not found"})
+
+    return jsonify({"success": True, "job": job.to_dict()})
+
+
+@app.route('/ai_usage', methods=['GET'])
+def ai_usage():
+    """Returns per-feature LLM call counts, tokens, estimated cost, cache hits and p50/p95 latency"""
+
+    # Check if user is logged in
+    if not session.get('logged_in'):
+        return jsonify({"success": False, "message": "Please login to perform this action"})
+
+    # Check user role
+    user_role = session.get('role')
+    if user_role not in ['super', 'admin']:
+        logger.warning(f"Unauthorized AI usage request by user with role: {user_role}")
+        return jsonify({"success": False, "message": "You don't have permission to view AI usage"})
+
+    return jsonify({"success": True, "usage": Client_manager.llm_metrics.summary()})
+
+
 @app.route('/custom_analysis', methods=['POST'])
 def custom_analysis():
     import time
@@ -1267,12 +1449,30 @@ def custom_analysis():
         print(f"   - Extension: {file_ext}")
         
         # Validate file extension
-        allowed_extensions = {'.csv', '.xlsx', '.xls'}
+        allowed_extensions = {'.csv', '.xlsx', '.xls', '.parquet', '.arrow', '.feather'}
         if file_ext not in allowed_extensions:
             print(f"ERROR: Invalid file extension: {file_ext}")
-            return jsonify({'error': f'Invalid file format: {file_ext}. Please upload CSV or Excel files only.'}), 400
+            return jsonify({'error': f'Invalid file format: {file_ext}. Please upload CSV, Excel, Parquet or Arrow files only.'}), 400
         
         print(f"✓ File extension valid")
+
+        # Streaming mode: stage events and each chart as server-sent events
+        if request.args.get('stream') == '1' or 'text/event-stream' in request.headers.get('Accept', ''):
+            print(f"   - Streaming response")
+            # The upload is read here: request.files is closed once the response starts streaming.
+            # Large CSVs are cleaned in chunks right away instead of being loaded whole.
+            cleaned = ai_manager.is_large_csv(file)
+            try:
+                dataframe = ai_manager.clean_file(file) if cleaned else ai_manager.read_file(file)
+            except Exception as e:
+                print(f"ERROR during read_file: {str(e)}")
+                return jsonify({'error': f'Failed to read file: {str(e)}'}), 400
+
+            return Response(
+                stream_with_context(stream_custom_analysis(dataframe, cleaned=cleaned)),
+                mimetype='text/event-stream',
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+            )
         
         # Start file cleaning process
         print(f"\n2. CLEANING FILE...")
@@ -1329,24 +1529,9 @@ def custom_analysis():
         chart_json = {}
         for chart_key, chart_data in analysis_result.items():
             print(f"   Processing {chart_key}...")
-            
-            if isinstance(chart_data, dict) and 'dataframe' in chart_data:
-                df = chart_data['dataframe']
-                
-                if df is not None and not df.empty:
-                    print(f"     - DataFrame shape: {df.shape}")
-                    print(f"     - Columns: {list(df.columns)}")
-                    
-                    chart_json[chart_key] = {
-                        'data': df.to_dict('records'),
-                        'metadata': chart_data.get('metadata', {}),
-                        'columns': df.columns.tolist()
-                    }
-                    print(f"     ✓ Chart data prepared ({len(df)} rows)")
-                else:
-                    print(f"     ⚠ Empty or None dataframe for {chart_key}")
-            else:
-                print(f"     ⚠ Invalid chart_data structure for {chart_key}")
+            chart_payload = chart_to_json(chart_key, chart_data)
+            if chart_payload:
+                chart_json[chart_key] = chart_payload
         
         process_time = time.time() - process_start
         print(f"✓ Results processed in {process_time:.2f}s")
@@ -1375,6 +1560,98 @@ def custom_analysis():
         return jsonify({'error': f'Analysis failed: {str(e)}'}), 500
 
 
+def chart_to_json(chart_key, chart_data):
+    """JSON-ready chart (records, metadata, columns), or None if the chart has no data"""
+    if not isinstance(chart_data, dict) or 'dataframe' not in chart_data:
+        print(f"     ⚠ Invalid chart_data structure for {chart_key}")
+        return None
+
+    df = chart_data['dataframe']
+    if df is None or df.empty:
+        print(f"     ⚠ Empty or None dataframe for {chart_key}")
+        return None
+
+    print(f"     - DataFrame shape: {df.shape}")
+    print(f"     - Columns: {list(df.columns)}")
+    print(f"     ✓ Chart data prepared ({len(df)} rows)")
+    return {
+        'data': df.to_dict('records'),
+        'metadata': chart_data.get('metadata', {}),
+        'columns': df.columns.tolist()
+    }
+
+
+def sse_event(event, data):
+    """Formats one server-sent event"""
+    return f"event: {event}\ndata: {app.json.dumps(data)}\n\n"
+
+
+def stream_custom_analysis(dataframe, cleaned=False):
+    """
+    Generator behind streaming /custom_analysis. Emits 'stage' events (parsed, cleaned, plan),
+    one 'chart' event per chart as soon as it is built, then 'done' - or 'error' if a step fails.
+    Charts from the rule-based plan are sent first with 'provisional': true; the planned
+    charts that follow replace them. `cleaned` means the upload was already cleaned in chunks.
+    """
+    import time
+    start_time = time.time()
+
+    try:
+        yield sse_event('stage', {'stage': 'parsed', 'rows': len(dataframe), 'columns': len(dataframe.columns)})
+
+        uploaded_dataframe = dataframe if cleaned else ai_manager.clean_all(dataframe)
+        if uploaded_dataframe is None or uploaded_dataframe.empty:
+            yield sse_event('error', {'error': 'No valid data found in the uploaded file'})
+            return
+        yield sse_event('stage', {
+            'stage': 'cleaned',
+            'rows': len(uploaded_dataframe),
+            'columns': len(uploaded_dataframe.columns),
+            'seconds': round(time.time() - start_time, 2)
+        })
+
+        # Rule-based charts render while the AI plan is on its way
+        if not settings_manager.custom_analysis_offline:
+            quick_plan = ai_manager.heuristic_plan(uploaded_dataframe)
+            for i, analysis in enumerate(quick_plan['analyses']):
+                chart = ai_manager.build_chart(uploaded_dataframe, analysis, i + 1)
+                if not chart:
+                    continue
+                chart_key, chart_data = chart
+                chart_payload = chart_to_json(chart_key, chart_data)
+                if chart_payload:
+                    yield sse_event('chart', {'key': f"quick_{chart_key}", 'provisional': True, **chart_payload})
+
+        plan = ai_manager.plan_analysis(uploaded_dataframe)
+        analyses = plan.get('analyses', [])
+        yield sse_event('stage', {
+            'stage': 'plan',
+            'source': plan.get('source'),
+            'charts': len(analyses),
+            'titles': [analysis.get('title') for analysis in analyses],
+            'seconds': round(time.time() - start_time, 2)
+        })
+
+        chart_count = 0
+        for i, analysis in enumerate(analyses):
+            chart = ai_manager.build_chart(uploaded_dataframe, analysis, i + 1)
+            if not chart:
+                continue
+            chart_key, chart_data = chart
+            chart_payload = chart_to_json(chart_key, chart_data)
+            if chart_payload:
+                chart_count += 1
+                yield sse_event('chart', {'key': chart_key, **chart_payload})
+
+        total_time = time.time() - start_time
+        print(f"STREAMED ANALYSIS - {chart_count} charts in {total_time:.2f}s")
+        yield sse_event('done', {'charts': chart_count, 'seconds': round(total_time, 2)})
+
+    except Exception as e:
+        logger.error(f"Error in streamed custom_analysis: {str(e)}", exc_info=True)
+        yield sse_event('error', {'error': f'Analysis failed: {str(e)}'})
+
+
 @app.route('/settings')
 def settings():
     # Check if user is logged in
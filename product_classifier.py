@@ -165,7 +165,7 @@ class ProductClassifier:
             'tire', 'tyre', 'wheel', 'rim'
         ],
         'battery': [
-            'battery', 'power bank'
+            'battery', 'power bank', 'deep cycle'
         ],
         'charger': [
             'charger', 'adapter', 'charging cable'
@@ -224,6 +224,17 @@ class ProductClassifier:
         ]
     }
     
+    _patterns = None
+
+    # Words that make a listing an accessory or part of the matched product
+    # ("Phone Case", "Car Brake Pads"), so the keyword type alone would be wrong
+    ACCESSORY_WORDS = [
+        'case', 'cover', 'pad', 'pads', 'part', 'parts', 'cable', 'strap', 'band',
+        'protector', 'mount', 'holder', 'stand', 'sleeve', 'replacement', 'spare',
+        'kit', 'accessory', 'accessories', 'lens', 'remote', 'skin', 'bracket', 'cord'
+    ]
+    _accessory_pattern = re.compile(r'\b(' + '|'.join(ACCESSORY_WORDS) + r')\b')
+
     # Category words to avoid (too broad)
     INVALID_CATEGORIES = [
         'retail', 'wholesale', 'telecommunications', 'electronics',
@@ -251,24 +262,74 @@ class ProductClassifier:
         # Combine name and description for searching
         search_text = f"{name} {description}".lower()
         
-        # Sort by keyword length (longest first) to match more specific terms first
-        sorted_types = sorted(
-            cls.PRODUCT_MAPPINGS.items(),
-            key=lambda x: max(len(kw) for kw in x[1]),
-            reverse=True
-        )
-        
         # Check each product type's keywords
-        for product_type, keywords in sorted_types:
-            for keyword in keywords:
-                # Use word boundary regex to match whole words only
-                # \b ensures we match complete words, not substrings
-                pattern = r'\b' + re.escape(keyword) + r'\b'
-                if re.search(pattern, search_text):
-                    print(f"  [CLASSIFIER] Matched keyword '{keyword}' → type '{product_type}'")
-                    return product_type
+        for product_type, keyword, pattern in cls._compiled_patterns():
+            if pattern.search(search_text):
+                print(f"  [CLASSIFIER] Matched keyword '{keyword}' → type '{product_type}'")
+                return product_type
         
         return None
+
+    @classmethod
+    def classify_name(cls, name):
+        """
+        Strict keyword classification for persisting without an AI check.
+        Matches on the product name only and returns None when the match is ambiguous:
+        keywords of more than one type ("Samsung 55 inch TV", "Laptop Bag"), or an
+        accessory/part word outside the matched keyword ("Phone Case", "Car Brake Pads").
+        
+        Args:
+            name (str): Product name
+            
+        Returns:
+            str: Product type or None if there is no single unambiguous match
+        """
+        text = str(name or "").lower()
+        matched_types = set()
+        remainder = text
+
+        # Longest keywords first, each removed once matched so 'deep cycle battery'
+        # does not also count as 'cycle' (bicycle)
+        for product_type, keyword, pattern in cls._compiled_patterns():
+            if pattern.search(remainder):
+                matched_types.add(product_type)
+                remainder = pattern.sub(' ', remainder)
+
+        if len(matched_types) != 1:
+            if len(matched_types) > 1:
+                print(f"  [CLASSIFIER] Ambiguous name '{name}' matches {sorted(matched_types)}")
+            return None
+
+        accessory = cls._accessory_pattern.search(remainder)
+        if accessory:
+            print(f"  [CLASSIFIER] Ambiguous name '{name}': accessory word '{accessory.group(1)}'")
+            return None
+
+        return matched_types.pop()
+
+    @classmethod
+    def _compiled_patterns(cls):
+        """
+        Returns (product_type, keyword, compiled pattern) triples in matching order.
+        Built once, since classification runs for every product in a normalization batch.
+        """
+        if cls._patterns is None:
+            # Sort keywords by length (longest first) to match more specific terms first,
+            # so 'deep cycle battery' hits 'battery' before the shorter 'cycle'
+            sorted_keywords = sorted(
+                ((product_type, keyword)
+                 for product_type, keywords in cls.PRODUCT_MAPPINGS.items()
+                 for keyword in keywords),
+                key=lambda x: len(x[1]),
+                reverse=True
+            )
+            # Use word boundary regex to match whole words only
+            # \b ensures we match complete words, not substrings
+            cls._patterns = [
+                (product_type, keyword, re.compile(r'\b' + re.escape(keyword) + r'\b'))
+                for product_type, keyword in sorted_keywords
+            ]
+        return cls._patterns
     
     @classmethod
     def is_valid_product_type(cls, product_type):
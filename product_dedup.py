@@ -0,0 +1,158 @@
+"""
+Product Deduplication Module
+Groups near-duplicate product listings across businesses using MinHash signatures
+and locality-sensitive hashing, so similar listings share a cluster ID
+"""
+import re
+import threading
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+
+class ProductDeduplicator:
+    """
+    MinHash/LSH index over product names and descriptions.
+    Only listings that collide in at least one LSH band are compared, which keeps
+    clustering well below quadratic time for large catalogues.
+    """
+
+    HASH_PRIME = np.uint64(4294967311)  # smallest prime above 2**32
+    TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+    def __init__(self, num_perm=64, bands=16, threshold=0.6, seed=42):
+        if num_perm % bands != 0:
+            raise ValueError("num_perm must be divisible by bands")
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+
+        rng = np.random.default_rng(seed)
+        # Coefficients below 2**31 keep a * x + b inside uint64 for 32-bit shingle hashes
+        self._a = rng.integers(1, 2 ** 31, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 2 ** 31, size=num_perm, dtype=np.uint64)
+
+        self.signatures = {}      # product id -> signature array
+        self.products = {}        # product id -> product row
+        self.cluster_ids = {}     # product id -> cluster id
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shingles(cls, product):
+        """Character trigrams of the name plus word tokens of the description"""
+        name_words = cls.TOKEN_PATTERN.findall(str(product.get('name') or '').lower())
+        name = ' '.join(name_words)
+        result = {f"n:{name[i:i + 3]}" for i in range(max(len(name) - 2, 1))} if name else set()
+
+        description = str(product.get('description') or '').lower()
+        result.update(f"d:{word}" for word in cls.TOKEN_PATTERN.findall(description))
+        return result
+
+    def signature(self, shingles):
+        """MinHash signature for a set of shingles"""
+        if not shingles:
+            return None
+
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode('utf-8')) for s in shingles),
+            dtype=np.uint64,
+            count=len(shingles)
+        )
+        permuted = (np.outer(hashes, self._a) + self._b) % self.HASH_PRIME
+        return permuted.min(axis=0)
+
+    def similarity(self, sig_a, sig_b):
+        """Estimated Jaccard similarity of two signatures"""
+        return float(np.mean(sig_a == sig_b))
+
+    def rebuild(self, products):
+        """
+        Computes signatures for the given product rows and clusters them.
+        The new index is built aside and swapped in at the end, so lookups running
+        meanwhile keep reading the previous one.
+        """
+        signatures = {}
+        rows = {}
+
+        for product in products:
+            product_id = product.get('id')
+            if product_id is None:
+                continue
+            sig = self.signature(self.shingles(product))
+            if sig is None:
+                continue
+            signatures[product_id] = sig
+            rows[product_id] = product
+
+        cluster_ids = self._cluster(signatures)
+        with self._lock:
+            self.signatures, self.products, self.cluster_ids = signatures, rows, cluster_ids
+
+    def _cluster(self, signatures):
+        """
+        Unions every candidate pair from the LSH buckets whose estimated similarity passes the threshold.
+        Returns {product id: cluster id}.
+        """
+        parent = {product_id: product_id for product_id in signatures}
+
+        def find(x):
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        for band in range(self.bands):
+            buckets = defaultdict(list)
+            start = band * self.rows
+            for product_id, sig in signatures.items():
+                buckets[sig[start:start + self.rows].tobytes()].append(product_id)
+
+            for members in buckets.values():
+                if len(members) < 2:
+                    continue
+                for i, first in enumerate(members):
+                    for other in members[i + 1:]:
+                        root_a, root_b = find(first), find(other)
+                        if root_a == root_b:
+                            continue
+                        if self.similarity(signatures[first], signatures[other]) >= self.threshold:
+                            parent[root_b] = root_a
+
+        # Name each cluster after its smallest member id so IDs stay stable across rebuilds
+        groups = defaultdict(list)
+        for product_id in signatures:
+            groups[find(product_id)].append(product_id)
+
+        cluster_ids = {}
+        for members in groups.values():
+            cluster_id = str(min(members, key=str))
+            for product_id in members:
+                cluster_ids[product_id] = cluster_id
+        return cluster_ids
+
+    def cluster_id(self, product_id):
+        """Returns the cluster ID of a product, or None if it is not indexed"""
+        with self._lock:
+            return self.cluster_ids.get(product_id)
+
+    def cluster_members(self, cluster_id):
+        """Returns the product rows in one cluster"""
+        with self._lock:
+            return [self.products[product_id]
+                    for product_id, cid in self.cluster_ids.items() if cid == cluster_id]
+
+    def cluster_count(self):
+        """Returns the number of clusters, singletons included"""
+        with self._lock:
+            return len(set(self.cluster_ids.values()))
+
+    def clusters(self, min_size=2):
+        """Returns {cluster id: [product rows]} for clusters with at least min_size listings"""
+        groups = defaultdict(list)
+        with self._lock:
+            for product_id, cluster_id in self.cluster_ids.items():
+                groups[cluster_id].append(self.products[product_id])
+        return {cid: rows for cid, rows in groups.items() if len(rows) >= min_size}
@@ -0,0 +1,173 @@
+"""
+Product Search Module
+Local TF-IDF vector search over product name, description and ai_name
+"""
+import re
+import threading
+from collections import Counter
+
+import numpy as np
+from scipy import sparse
+
+
+class ProductVectorIndex:
+    """
+    Sparse TF-IDF index of products with cosine top-k lookup.
+    Products can be added, updated or removed one at a time; the weighted
+    matrix is rebuilt lazily on the next query after a change.
+    """
+
+    TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+    def __init__(self):
+        self.vocabulary = {}          # term -> column index
+        self.document_frequency = Counter()
+        self.term_counts = {}         # product id -> Counter of column indices
+        self.products = {}            # product id -> product row
+        self._row_ids = []
+        self._matrix = None
+        self._idf = None
+        self._dirty = True
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.products)
+
+    @classmethod
+    def tokenize(cls, text):
+        """
+        Splits text into word tokens and character trigrams of each word.
+        Trigrams let 'headphones', 'head-phones' and 'headphone' share most features.
+        """
+        words = cls.TOKEN_PATTERN.findall((text or '').lower().replace('_', ' '))
+        tokens = list(words)
+        for word in words:
+            padded = f"#{word}#"
+            tokens.extend(f"3:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+        return tokens
+
+    @staticmethod
+    def product_text(product):
+        """Text indexed for a product row"""
+        return ' '.join(str(product.get(field) or '') for field in ('name', 'ai_name', 'description'))
+
+    def upsert(self, product):
+        """Adds a product or replaces its previous entry"""
+        product_id = product.get('id')
+        if product_id is None:
+            return
+
+        with self._lock:
+            self._remove_locked(product_id)
+
+            counts = Counter()
+            for token in self.tokenize(self.product_text(product)):
+                column = self.vocabulary.get(token)
+                if column is None:
+                    column = len(self.vocabulary)
+                    self.vocabulary[token] = column
+                counts[column] += 1
+
+            for column in counts:
+                self.document_frequency[column] += 1
+
+            self.term_counts[product_id] = counts
+            self.products[product_id] = product
+            self._dirty = True
+
+    def remove(self, product_id):
+        """Drops a product from the index"""
+        with self._lock:
+            self._remove_locked(product_id)
+
+    def _remove_locked(self, product_id):
+        counts = self.term_counts.pop(product_id, None)
+        if counts is None:
+            return
+        for column in counts:
+            self.document_frequency[column] -= 1
+        self.products.pop(product_id, None)
+        self._dirty = True
+
+    def rebuild(self, products):
+        """
+        Replaces the whole index with the given product rows. The new index is built
+        aside and swapped in, so searches running meanwhile use the previous one.
+        """
+        fresh = type(self)()
+        for product in products:
+            fresh.upsert(product)
+
+        with self._lock:
+            self.vocabulary = fresh.vocabulary
+            self.document_frequency = fresh.document_frequency
+            self.term_counts = fresh.term_counts
+            self.products = fresh.products
+            self._dirty = True
+
+    def _build_matrix(self):
+        """Builds the L2-normalised TF-IDF matrix (one row per product)"""
+        row_ids = list(self.term_counts.keys())
+        n_docs = len(row_ids)
+        n_terms = len(self.vocabulary)
+
+        df = np.zeros(n_terms, dtype=np.float64)
+        for column, count in self.document_frequency.items():
+            df[column] = count
+        idf = np.log((1 + n_docs) / (1 + df)) + 1.0
+
+        rows, cols, values = [], [], []
+        for row, product_id in enumerate(row_ids):
+            for column, count in self.term_counts[product_id].items():
+                rows.append(row)
+                cols.append(column)
+                values.append(1.0 + np.log(count))
+
+        matrix = sparse.csr_matrix(
+            (np.asarray(values, dtype=np.float64), (rows, cols)),
+            shape=(n_docs, n_terms)
+        )
+        matrix = matrix.multiply(idf).tocsr()
+
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        matrix = sparse.diags(1.0 / norms).dot(matrix).tocsr()
+
+        self._row_ids = row_ids
+        self._matrix = matrix
+        self._idf = idf
+        self._dirty = False
+
+    def search(self, query, top_k=10, min_score=0.1):
+        """Returns [(product row, score)] ranked by cosine similarity to the query"""
+        with self._lock:
+            if not self.term_counts:
+                return []
+            if self._dirty:
+                self._build_matrix()
+
+            counts = Counter(
+                self.vocabulary[token] for token in self.tokenize(query)
+                if token in self.vocabulary
+            )
+            if not counts:
+                return []
+
+            columns = np.fromiter(counts.keys(), dtype=np.int64)
+            weights = (1.0 + np.log(np.fromiter(counts.values(), dtype=np.float64))) * self._idf[columns]
+            weights /= np.linalg.norm(weights)
+
+            query_vector = sparse.csr_matrix(
+                (weights, (np.zeros(len(columns), dtype=np.int64), columns)),
+                shape=(1, self._matrix.shape[1])
+            )
+            scores = self._matrix.dot(query_vector.T).toarray().ravel()
+
+            top_k = min(top_k, len(scores))
+            candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+            ranked = candidates[np.argsort(-scores[candidates])]
+
+            return [
+                (self.products[self._row_ids[i]], float(scores[i]))
+                for i in ranked if scores[i] >= min_score
+            ]
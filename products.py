@@ -4,13 +4,27 @@ import os
 from datetime import datetime, timedelta
 from analysis import AnalAI
 import numpy as np
+import time
+import threading
+import re
+import json
+from collections import Counter, defaultdict
+from itertools import chain
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict
 
 from settings import SettingsManager
 settings_manager = SettingsManager()
 
 from clients import Clients
-# Removed ProductClassifier - using AI only now
+from product_search import ProductVectorIndex
+from product_dedup import ProductDeduplicator
+from spell_corrector import SpellCorrector
+from result_cache import ResultCache
+from rate_limiter import call_with_retries, estimate_tokens
+from product_classifier import ProductClassifier
+from classification_cache import ClassificationCache
+from write_buffer import BulkUpdateBuffer
 
 
 load_dotenv()  # loads the .env file
@@ -35,6 +49,220 @@ class Products(Clients):
 
     def __init__(self):
         super().__init__()
+        self.product_index = ProductVectorIndex()
+        self.product_clusters = ProductDeduplicator(threshold=settings_manager.duplicate_product_threshold)
+        self.spell_corrector = SpellCorrector.from_classifier()
+        self._product_index_loaded_at = None
+        self._product_index_refreshing = threading.Lock()
+        # One rebuild at a time, whether from the background refresh or the cluster endpoints
+        self._product_index_lock = threading.Lock()
+
+        # Hot searches are served from memory until they expire or normalization touches their type
+        self.search_cache = ResultCache(
+            maxsize=settings_manager.search_cache_size,
+            ttl_seconds=settings_manager.search_cache_ttl_seconds
+        )
+        self.summary_cache = ResultCache(
+            maxsize=settings_manager.search_cache_size,
+            ttl_seconds=settings_manager.search_cache_ttl_seconds
+        )
+
+        # AI answers persisted by product fingerprint, so repeated listings skip the API
+        self.classification_cache = ClassificationCache(settings_manager.classification_cache_path)
+
+        # How many products each classification tier resolved since startup
+        self.classification_tiers = Counter()
+        self._classification_lock = threading.Lock()
+
+    def _ensure_product_index(self):
+        """
+        Loads the local TF-IDF product index, the near-duplicate clusters and the
+        spelling vocabulary, reloading them once they are older than the refresh interval
+        """
+        if not self._product_index_is_stale():
+            return
+
+        with self._product_index_lock:
+            # Another thread may have finished a rebuild while this one waited
+            if self._product_index_is_stale():
+                self._rebuild_product_index()
+
+    def _rebuild_product_index(self):
+        # Paged, so the index and vocabulary cover every product and not just the API's row cap
+        rows = []
+        page_size = settings_manager.product_index_page_size
+        while True:
+            response = (
+                self.supabase_client.table('products')
+                .select('id, name, description, ai_name, business_id, price, category')
+                .order('id')
+                .range(len(rows), len(rows) + page_size - 1)
+                .execute()
+            )
+            rows.extend(response.data or [])
+            if len(response.data or []) < page_size:
+                break
+        products = [p for p in rows if p.get('business_id') not in self.admin_business_ids]
+
+        self.product_index.rebuild(products)
+        self.product_clusters.rebuild(products)
+
+        spell_corrector = SpellCorrector.from_classifier()
+        for product in products:
+            if product.get('ai_name'):
+                spell_corrector.add_text(product['ai_name'])
+        self.spell_corrector = spell_corrector
+
+        self._product_index_loaded_at = datetime.utcnow()
+        print(f"[SEARCH] Local product index built with {len(self.product_index)} products "
+              f"in {self.product_clusters.cluster_count()} clusters")
+
+    def _product_index_is_stale(self):
+        max_age = timedelta(minutes=settings_manager.product_index_refresh_minutes)
+        return not self._product_index_loaded_at or datetime.utcnow() - self._product_index_loaded_at >= max_age
+
+    def _refresh_product_index_in_background(self):
+        """Starts one background reload of the product index and vocabulary if they are stale"""
+        if not self._product_index_is_stale() or not self._product_index_refreshing.acquire(blocking=False):
+            return
+
+        def refresh():
+            try:
+                self._ensure_product_index()
+            except Exception as e:
+                print(f"[SEARCH] Could not refresh spelling vocabulary: {e}")
+            finally:
+                self._product_index_refreshing.release()
+
+        threading.Thread(target=refresh, name='product-index-refresh', daemon=True).start()
+
+    def similar_products(self, product_query, top_k=None):
+        """
+        Returns products ranked by TF-IDF cosine similarity to the query.
+        Served from the index in memory; a stale one is reloaded in the background, so
+        this returns nothing until the first load has finished.
+        """
+        try:
+            self._refresh_product_index_in_background()
+            matches = self.product_index.search(
+                product_query,
+                top_k=top_k or settings_manager.similar_products_limit
+            )
+            return [{**product, 'score': round(score, 4)} for product, score in matches]
+
+        except Exception as e:
+            print(f"[SEARCH] Local similarity search failed: {e}")
+            return []
+
+    def suggest_product_types(self, product_query, limit=5):
+        """
+        "Did you mean" product types for a query with no exact matches: the distinct ai_name
+        values of similar products scoring at least settings.product_suggestion_min_score.
+        Never fed into the analytics, which only use exact _search_products matches.
+        """
+        suggestions = []
+        for product in self.similar_products(product_query):
+            ai_name = product.get('ai_name')
+            if product['score'] < settings_manager.product_suggestion_min_score or not ai_name:
+                continue
+            if ai_name not in suggestions and self._normalize_query(ai_name) != self._normalize_query(product_query):
+                suggestions.append(ai_name)
+            if len(suggestions) >= limit:
+                break
+        return suggestions
+
+    def correct_product_query(self, product_query):
+        """
+        Spell-corrects a product query against the product types in the database.
+        Returns the corrected query, or None if nothing changed or the database vocabulary
+        has not loaded yet: the classifier keywords alone turn real words into their
+        neighbours ('router' -> 'trouser'). A stale vocabulary is reloaded in the background,
+        so no database call sits on the request path.
+        """
+        self._refresh_product_index_in_background()
+        if not self._product_index_loaded_at:
+            return None
+
+        corrected, changed = self.spell_corrector.correct(product_query)
+        if not changed or self._normalize_query(corrected) == self._normalize_query(product_query):
+            return None
+        return corrected
+
+    def resolve_product_query(self, product_query):
+        """
+        Picks the query to summarize. The original query is always searched first and its
+        spelling correction is only searched when the original matches no products.
+        Returns (query to summarize, correction searched instead or None,
+        correction to offer as "did you mean" or None).
+        """
+        corrected = self.correct_product_query(product_query)
+        if not corrected:
+            return product_query, None, None
+
+        if self._search_products(product_query):
+            return product_query, None, corrected
+
+        if self._search_products(corrected):
+            print(f"[SEARCH] No products for '{product_query}', searching '{corrected}' instead")
+            return corrected, corrected, None
+
+        return product_query, None, None
+
+    def product_cluster_id(self, product_id):
+        """Returns the near-duplicate cluster ID of a product, or None if it is not indexed"""
+        try:
+            self._ensure_product_index()
+            return self.product_clusters.cluster_id(product_id)
+        except Exception as e:
+            print(f"Exception: {e}")
+            return None
+
+    def cluster_products(self, cluster_id):
+        """Returns every listing in a near-duplicate cluster"""
+        try:
+            self._ensure_product_index()
+            return self.product_clusters.cluster_members(cluster_id)
+        except Exception as e:
+            print(f"Exception: {e}")
+            return []
+
+    def duplicate_product_clusters(self, min_size=2):
+        """
+        Returns the near-duplicate clusters sorted by the number of businesses listing them.
+        Each entry has the cluster ID, a representative name, listing count, business count and product IDs.
+        """
+        try:
+            self._ensure_product_index()
+            summary = []
+            for cluster_id, rows in self.product_clusters.clusters(min_size=min_size).items():
+                summary.append({
+                    'cluster_id': cluster_id,
+                    'name': rows[0].get('name'),
+                    'ai_name': rows[0].get('ai_name'),
+                    'listings': len(rows),
+                    'businesses': len({row.get('business_id') for row in rows}),
+                    'product_ids': [row['id'] for row in rows],
+                })
+            return sorted(summary, key=lambda c: (c['businesses'], c['listings']), reverse=True)
+
+        except Exception as e:
+            print(f"Exception: {e}")
+            return []
+
+    def cluster_by_business(self, cluster_id):
+        """Returns the number of businesses selling a near-duplicate cluster (excluding admin businesses)"""
+        return len({row.get('business_id') for row in self.cluster_products(cluster_id)})
+
+    def cluster_market_share(self, cluster_id):
+        """Returns the market share (%) of a near-duplicate cluster (excluding admin businesses)"""
+        try:
+            product_ids = [row['id'] for row in self.cluster_products(cluster_id)]
+            if not product_ids:
+                return 0
+            return self._market_share_for_ids(product_ids)
+        except Exception as e:
+            print(f"Exception in cluster_market_share: {e}")
+            return 0
 
     def _build_search_variations(self, product_query):
         """Helper to create singular/plural variations for OR pattern"""
@@ -55,12 +283,62 @@ class Products(Clients):
         
         return variations
 
+    def _normalize_query(self, product_query):
+        """Cache key for a product query: lower-case words separated by single spaces"""
+        return ' '.join(str(product_query or '').lower().replace('_', ' ').split())
+
+    def _invalidate_product_caches(self, product_types):
+        """
+        Drops cached searches and summaries that could match any of the given ai_name values.
+        Called after normalization writes new product types. This only reaches the caches of
+        the process that ran the normalization: the gunicorn workers serving searches rely on
+        settings.search_cache_ttl_seconds alone to pick up new types.
+        """
+        type_words = set()
+        type_phrases = set()
+        for product_type in product_types:
+            phrase = self._normalize_query(product_type)
+            if phrase:
+                type_phrases.add(phrase)
+                type_words.update(phrase.split())
+
+        if not type_phrases:
+            return
+
+        def affected(key):
+            variations = set(self._build_search_variations(key))
+            for word in key.split():
+                variations.update(self._build_search_variations(word))
+            return (
+                bool(variations & type_words)
+                or any(variation in phrase for variation in variations for phrase in type_phrases)
+            )
+
+        dropped = self.search_cache.invalidate(affected) + self.summary_cache.invalidate(affected)
+        if dropped:
+            print(f"[CACHE] Invalidated {dropped} cached product results for {len(type_phrases)} product types")
+
     def _search_products(self, product_query):
+        """
+        Cached wrapper around _run_product_search.
+        Results are keyed by the normalized query. A search that fails raises and is not cached.
+        """
+        key = self._normalize_query(product_query)
+        cached = self.search_cache.get(key)
+        if cached is not None:
+            print(f"[SEARCH] Cache hit for query: {product_query}")
+            return cached
+
+        results = self._run_product_search(product_query)
+        self.search_cache.set(key, results)
+        return results
+
+    def _run_product_search(self, product_query):
         """
         Helper method for efficient full-text search on ai_name.
         Uses PostgreSQL full-text search via RPC function.
         Falls back to OR pattern with ILIKE if no results found.
-        Filters out admin businesses.
+        Filters out admin businesses. Raises if every search method fails.
         """
         try:
             # First attempt: Full-text search (fastest and handles stemming)
@@ -96,9 +374,8 @@ class Products(Clients):
                                if p.get('business_id') not in self.admin_business_ids]
                 print(f"[SEARCH] OR pattern found {len(filtered_data)} products (excluding admin)")
                 return filtered_data
-            else:
-                print(f"[SEARCH] No products found for query: {product_query}")
-            
+
+            print(f"[SEARCH] No products found for query: {product_query}")
             return []
             
         except Exception as e:
@@ -116,8 +393,9 @@ class Products(Clients):
                                if p.get('business_id') not in self.admin_business_ids]
                 return filtered_data
             except Exception as fallback_error:
+                # Raise rather than return [], so the failure is not cached as "no products"
                 print(f"[SEARCH] All search methods failed: {fallback_error}")
-                return []
+                raise
 
     def total_products(self):
         """Returns the total number of products from businesses that are active (excluding admin businesses)"""
@@ -363,64 +641,242 @@ class Products(Clients):
     
 
 
+    PRODUCT_TYPE_PROMPT = (
+        "You are a product classifier. Given a product name, description, and category, "
+        "return the most specific product type in 1-2 words maximum. "
+        "Be specific but not overly broad. Examples:\n"
+        "- iPhone 15 → phone\n"
+        "- Nike Air Max → shoes\n"
+        "- 300W Solar Panel → solar_panel\n"
+        "- Deep Cycle Battery → battery\n"
+        "- 3000W Inverter → inverter\n"
+        "- MPPT Charge Controller → charge_controller\n"
+        "- Air Filter → filter\n"
+        "- Brake Pads → brake_pad\n"
+        "- LED Bulb → bulb\n"
+        "- Chocolate Cake → cake\n\n"
+        "Use underscores for multi-word types. Return ONLY the product type, nothing else."
+    )
+
+    def _clean_product_type(self, text):
+        """Normalizes a raw AI answer into a lower-case, underscore-joined product type"""
+        product_type = (text or '').strip().lower()
+        # Remove any extra punctuation or quotes
+        product_type = ''.join(c for c in product_type if c.isalnum() or c == '_' or c.isspace())
+        product_type = product_type.strip()
+
+        # Take first word/phrase only
+        if ' ' in product_type:
+            product_type = product_type.replace(' ', '_')
+
+        return product_type or None
+
     def ai_product_naming(self, name, description, category):
-        """Returns a generic, searchable product type for classification using AI"""
-        
-        try:
-            ai_response = self.open_ai_client.chat.completions.create(
+        """
+        Returns a generic, searchable product type for classification using AI.
+        Calls go through the shared OpenAI rate limiter and are retried with
+        jittered backoff on rate-limit and transient errors.
+        """
+        messages = [
+            {"role": "system", "content": self.PRODUCT_TYPE_PROMPT},
+            {
+                "role": "user", 
+                "content": f"Product name: {name}\nCategory: {category}\nDescription: {description}\n\nProduct type:"
+            }
+        ]
+        estimated = estimate_tokens(''.join(m["content"] for m in messages), completion_tokens=10)
+
+        def request():
+            self.open_ai_limiter.acquire(estimated)
+            return self.open_ai_client.chat.completions.create(
+                feature="product_naming",
                 model=settings_manager.open_ai_modal,
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": (
-                            "You are a product classifier. Given a product name, description, and category, "
-                            "return the most specific product type in 1-2 words maximum. "
-                            "Be specific but not overly broad. Examples:\n"
-                            "- iPhone 15 → phone\n"
-                            "- Nike Air Max → shoes\n"
-                            "- 300W Solar Panel → solar_panel\n"
-                            "- Deep Cycle Battery → battery\n"
-                            "- 3000W Inverter → inverter\n"
-                            "- MPPT Charge Controller → charge_controller\n"
-                            "- Air Filter → filter\n"
-                            "- Brake Pads → brake_pad\n"
-                            "- LED Bulb → bulb\n"
-                            "- Chocolate Cake → cake\n\n"
-                            "Use underscores for multi-word types. Return ONLY the product type, nothing else."
-                        )
-                    },
-                    {
-                        "role": "user", 
-                        "content": f"Product name: {name}\nCategory: {category}\nDescription: {description}\n\nProduct type:"
-                    }
-                ],
+                messages=messages,
                 max_completion_tokens=10
             )
 
+        try:
+            ai_response = call_with_retries(request, max_retries=settings_manager.open_ai_max_retries)
+
             if ai_response.choices and len(ai_response.choices) > 0:
                 message_obj = ai_response.choices[0].message
                 if message_obj and message_obj.content:
-                    # Clean the response
-                    product_type = message_obj.content.strip().lower()
-                    # Remove any extra punctuation or quotes
-                    product_type = ''.join(c for c in product_type if c.isalnum() or c == '_' or c.isspace())
-                    product_type = product_type.strip()
-                    
-                    # Take first word/phrase only
-                    if ' ' in product_type:
-                        product_type = product_type.replace(' ', '_')
-                    
-                    print(f"  ✓ AI classified as: '{product_type}'")
-                    return product_type
+                    return self._clean_product_type(message_obj.content)
 
         except Exception as e:
-            print(f"  ✗ AI naming error: {e}")
+            print(f"  ✗ AI naming error for '{name}': {e}")
 
         return None
 
+    def ai_product_naming_batch(self, rows):
+        """
+        Classifies several products with one chat completion.
+        Returns {index in rows: product type} for every entry that came back valid;
+        callers fall back to ai_product_naming for the rest. Returns None when the
+        request itself failed (retries exhausted), so callers don't retry per product.
+        """
+        listing = '\n'.join(
+            f"{i}. Product name: {row['name']} | Category: {row.get('category') or ''} | "
+            f"Description: {(row.get('description') or '')[:200]}"
+            for i, row in enumerate(rows)
+        )
+        messages = [
+            {
+                "role": "system",
+                "content": self.PRODUCT_TYPE_PROMPT.replace(
+                    "Return ONLY the product type, nothing else.",
+                    "You will receive a numbered list of products. Return ONLY a JSON array with one "
+                    "object per product, like [{\"i\": 0, \"type\": \"phone\"}], nothing else."
+                )
+            },
+            {"role": "user", "content": f"{listing}\n\nProduct types (JSON):"}
+        ]
+        completion_tokens = 15 * len(rows) + 50
+        estimated = estimate_tokens(''.join(m["content"] for m in messages), completion_tokens=completion_tokens)
+
+        def request():
+            self.open_ai_limiter.acquire(estimated)
+            return self.open_ai_client.chat.completions.create(
+                feature="product_naming_batch",
+                model=settings_manager.open_ai_modal,
+                messages=messages,
+                max_completion_tokens=completion_tokens
+            )
+
+        try:
+            ai_response = call_with_retries(request, max_retries=settings_manager.open_ai_max_retries)
+            content = ai_response.choices[0].message.content if ai_response.choices else None
+            return self._parse_batch_types(content, len(rows))
+
+        except Exception as e:
+            print(f"  ✗ AI batch naming error for {len(rows)} products: {e}")
+            return None
+
+    def _parse_batch_types(self, content, expected):
+        """Validates a batch answer and returns {index: product type} for the usable entries"""
+        match = re.search(r'\[.*\]', content or '', re.DOTALL)
+        if not match:
+            return {}
+
+        try:
+            items = json.loads(match.group(0))
+        except json.JSONDecodeError:
+            return {}
+
+        types = {}
+        for item in items if isinstance(items, list) else []:
+            if not isinstance(item, dict):
+                continue
+            index = item.get("i")
+            product_type = self._clean_product_type(str(item.get("type") or ""))
+            if (isinstance(index, int) and 0 <= index < expected and index not in types
+                    and product_type and len(product_type) <= 40
+                    and ProductClassifier.is_valid_product_type(product_type)):
+                types[index] = product_type
+        return types
+
+    def _record_tier(self, tier):
+        with self._classification_lock:
+            self.classification_tiers[tier] += 1
+
+    def _classify_locally(self, row):
+        """
+        Returns (product type, tier) using only local tiers, or (None, None):
+        'keyword' - unambiguous ProductClassifier keyword match on the name
+        'cache'   - earlier AI answer for the same normalized product text
+        """
+        name = row["name"]
+        description = row.get("description") or ""
+
+        # Ambiguous names (several types, accessories, parts) go to the cache and AI tiers
+        product_type = ProductClassifier.classify_name(name)
+        if product_type and ProductClassifier.is_valid_product_type(product_type):
+            self._record_tier('keyword')
+            return product_type, 'keyword'
+
+        product_type = self.classification_cache.get(name, row.get("category") or "", description)
+        self.llm_metrics.record_cache("product_naming", hit=bool(product_type))
+        if product_type:
+            self._record_tier('cache')
+            return product_type, 'cache'
+
+        return None, None
+
+    def _classify_with_ai(self, rows):
+        """
+        Returns [(row, product type, tier)] for products the local tiers could not resolve:
+        'ai_batch' - answered by a batched prompt
+        'ai'       - answered by a single-product retry after the batch entry failed validation
+        'fallback' - first word of the category (or name) when AI fails
+        If the batch request itself fails (e.g. still rate limited after retries), every row
+        takes the fallback: one request per product would only add to the rate limiting.
+        """
+        batch_types = self.ai_product_naming_batch(rows) if len(rows) > 1 else {}
+        batch_failed = batch_types is None
+        if batch_failed:
+            print(f"  ⚠ Batch of {len(rows)} products failed, using the category fallback")
+            batch_types = {}
+        results = []
+
+        for i, row in enumerate(rows):
+            name = row["name"]
+            description = row.get("description") or ""
+            category = row.get("category") or ""
+
+            product_type, tier = batch_types.get(i), 'ai_batch'
+            if not product_type and not batch_failed:
+                product_type, tier = self.ai_product_naming(name, description, category), 'ai'
+
+            if product_type:
+                self.classification_cache.set(name, category, description, product_type)
+            else:
+                # Use first word of category as last resort
+                product_type, tier = (row.get("category") or name).lower().split()[0], 'fallback'
+
+            self._record_tier(tier)
+            results.append((row, str(product_type).strip().lower(), tier))
+
+        return results
+
+    def _with_duplicates(self, results, duplicates):
+        """Yields each AI result followed by the identical listings that share its answer"""
+        for row, product_type, tier in results:
+            yield row, product_type, tier
+            fingerprint = self.classification_cache.fingerprint(
+                row["name"], row.get("category") or "", row.get("description") or ""
+            )
+            for duplicate in duplicates.get(fingerprint, []):
+                self._record_tier('cache')
+                yield duplicate, product_type, 'cache'
+
+    def classification_hit_rates(self, tiers=None):
+        """Returns {tier: {'count', 'rate'}} for the given tier counts (defaults to totals since startup)"""
+        tiers = tiers if tiers is not None else self.classification_tiers
+        total = sum(tiers.values())
+        return {
+            tier: {'count': count, 'rate': round(count / total, 4) if total else 0.0}
+            for tier, count in tiers.items()
+        }
+
+    def _report_normalization_progress(self, done, total, started_at):
+        """Prints throughput and an ETA every few products and at the end"""
+        if done % 25 != 0 and done != total:
+            return
+
+        elapsed = time.time() - started_at
+        rate = done / elapsed if elapsed > 0 else 0
+        remaining = (total - done) / rate if rate > 0 else 0
+        print(f"[NORMALIZE] {done}/{total} classified ({done / total:.0%}) - "
+              f"{rate:.1f} products/s, ~{remaining:.0f}s remaining")
 
     def normalize_new_products(self):
-        """Normalizes new products and updates Supabase with AI-generated searchable product types (excluding admin businesses)"""
+        """
+        Normalizes new products and updates Supabase with searchable product types (excluding admin businesses).
+        Each product tries the keyword classifier and the classification cache first and only goes to AI when
+        both fail. The remaining products are classified in batched prompts (settings.classification_batch_size)
+        on settings.normalization_workers threads under the shared rate limiter; only ai_name and ai_name_updated_at
+        are written back, through a BulkUpdateBuffer in batches of settings.normalization_write_batch_size rows.
+        """
         try:
             from datetime import timezone
             
@@ -445,50 +901,94 @@ class Products(Clients):
                 print("No new products to normalize.")
                 return
 
-            print(f"Found {len(products_to_normalize)} products to normalize (excluding admin)\n")
+            total = len(products_to_normalize)
+            print(f"Found {total} products to normalize (excluding admin)\n")
             print("=" * 60)
 
-            success_count = 0
-            fail_count = 0
+            written_types = set()
+            run_tiers = Counter()
+            started_at = time.time()
+            # One timestamp per run, so products given the same type share one UPDATE
+            updated_at = datetime.now(timezone.utc).isoformat()
+            rows_by_id = {row["id"]: row for row in products_to_normalize}
+
+            def on_written(rows):
+                for written in rows:
+                    written_types.add(written["ai_name"])
+                    # Keep the local search index in step with the new ai_name
+                    if self._product_index_loaded_at:
+                        self.product_index.upsert({**rows_by_id[written["id"]], **written})
+
+            write_buffer = BulkUpdateBuffer(
+                self.supabase_client, "products",
+                batch_size=settings_manager.normalization_write_batch_size,
+                flush_interval=settings_manager.normalization_flush_seconds,
+                on_written=on_written
+            )
 
+            # Keyword and cache tiers are local and cheap, so resolve them up front.
+            # Identical listings left over are sent to AI once and share the answer.
+            local_results = []
+            ai_rows = []
+            duplicates = defaultdict(list)
             for row in products_to_normalize:
-                print(f"\nProduct: {row['name']}")
-                print(f"  Category: {row.get('category', 'N/A')}")
-                print(f"  Description: {(row.get('description') or 'N/A')[:60]}...")
-                
-                # Generate product type (tries keywords first, then AI)
-                ai_product_type = self.ai_product_naming(
-                    row["name"], 
-                    row.get("description") or "", 
-                    row.get("category") or ""
+                product_type, tier = self._classify_locally(row)
+                if product_type:
+                    local_results.append((row, str(product_type).strip().lower(), tier))
+                    continue
+
+                fingerprint = self.classification_cache.fingerprint(
+                    row["name"], row.get("category") or "", row.get("description") or ""
                 )
+                if fingerprint in duplicates:
+                    duplicates[fingerprint].append(row)
+                else:
+                    duplicates[fingerprint] = []
+                    ai_rows.append(row)
+
+            batch_size = settings_manager.classification_batch_size
+            batches = [ai_rows[i:i + batch_size] for i in range(0, len(ai_rows), batch_size)]
+            print(f"[NORMALIZE] {len(local_results)} resolved locally, "
+                  f"{len(ai_rows)} sent to AI in {len(batches)} batches")
+
+            with ThreadPoolExecutor(max_workers=settings_manager.normalization_workers) as executor:
+                futures = [executor.submit(self._classify_with_ai, batch) for batch in batches]
+                ai_results = chain.from_iterable(
+                    self._with_duplicates(future.result(), duplicates) for future in as_completed(futures)
+                )
+
+                for done, (row, ai_product_type, tier) in enumerate(chain(local_results, ai_results), start=1):
+                    run_tiers[tier] += 1
+                    print(f"  {row['name']} → '{ai_product_type}' ({tier})")
+
+                    # Queue the Supabase write; only the normalization columns, so edits
+                    # made to the product during the run are not overwritten
+                    write_buffer.add({
+                        "id": row["id"],
+                        "ai_name": ai_product_type,
+                        "ai_name_updated_at": updated_at
+                    })
+
+                    self._report_normalization_progress(done, total, started_at)
+
+            write_buffer.close()
+            write_report = write_buffer.report()
+            success_count = write_report['written']
+            fail_count = write_report['failed']
 
-                # Fallback if AI fails
-                if not ai_product_type:
-                    print(f"  ⚠ AI classification failed, using category as fallback")
-                    # Use first word of category as last resort
-                    ai_product_type = (row.get("category") or row["name"]).lower().split()[0]
-
-                print(f"  → Final Type: '{ai_product_type}'")
-
-                # Update Supabase
-                try:
-                    self.supabase_client.table("products").update({
-                        "ai_name": str(ai_product_type).strip().lower(),
-                        "ai_name_updated_at": datetime.now(timezone.utc).isoformat()
-                    }).eq("id", row["id"]).execute()
-                    
-                    print(f"  ✓ Updated in database")
-                    success_count += 1
-                        
-                except Exception as update_error:
-                    print(f"  ✗ Database update failed: {update_error}")
-                    fail_count += 1
+            # Cached searches for these types no longer reflect the table
+            self._invalidate_product_caches(written_types)
 
             print("\n" + "=" * 60)
-            print(f"Normalization complete!")
+            print(f"Normalization complete in {time.time() - started_at:.1f}s!")
             print(f"  ✓ Success: {success_count}")
             print(f"  ✗ Failed: {fail_count}")
+            print(f"  Database writes: {write_report['requests']} update requests")
+            for tier, stats in self.classification_hit_rates(run_tiers).items():
+                print(f"  {tier}: {stats['count']} ({stats['rate']:.0%})")
+            cache_stats = self.classification_cache.stats()
+            print(f"  Classification cache: {cache_stats['size']} entries, "
+                  f"{cache_stats['hits']} hits / {cache_stats['misses']} misses")
 
         except Exception as e:
             print(f"Exception: {e}")
@@ -766,42 +1266,54 @@ class Products(Clients):
                 return 0
 
             product_ids = [p['id'] for p in products]
+            return self._market_share_for_ids(product_ids)
 
-            # Query orders for these products
-            response = (
-                self.supabase_client.table('orders')
-                .select('total_amount, business_id, order_status, order_payment_status')
-                .in_('product_id', product_ids)
-                .eq('order_status', 'completed')
-                .eq('order_payment_status', 'completed')
-                .execute()
-            )
+        except Exception as e:
+            print(f"Exception in product_market_share: {e}")
+            return 0
 
-            if not response.data:
-                product_total = 0
-            else:
-                # Filter out admin businesses
-                filtered_orders = [
-                    order for order in response.data
-                    if order.get('business_id') not in self.admin_business_ids
-                ]
-                product_total = sum(order.get('total_amount', 0) or 0 for order in filtered_orders)
+    def _market_share_for_ids(self, product_ids):
+        """Returns the share (%) of completed revenue earned by the given product IDs (excluding admin businesses)"""
+        # Query orders for these products
+        response = (
+            self.supabase_client.table('orders')
+            .select('total_amount, business_id, order_status, order_payment_status')
+            .in_('product_id', product_ids)
+            .eq('order_status', 'completed')
+            .eq('order_payment_status', 'completed')
+            .execute()
+        )
 
-            grand_total = self.total_revenue()
+        if not response.data:
+            product_total = 0
+        else:
+            # Filter out admin businesses
+            filtered_orders = [
+                order for order in response.data
+                if order.get('business_id') not in self.admin_business_ids
+            ]
+            product_total = sum(order.get('total_amount', 0) or 0 for order in filtered_orders)
 
-            if grand_total == 0:
-                return 0  # avoid division by zero
+        grand_total = self.total_revenue()
 
-            market_share = (product_total / grand_total) * 100
-            return round(market_share, 2)
+        if grand_total == 0:
+            return 0  # avoid division by zero
 
-        except Exception as e:
-            print(f"Exception in product_market_share: {e}")
-            return 0
+        market_share = (product_total / grand_total) * 100
+        return round(market_share, 2)
 
     def product_information_summary(self, product_query):
         """returns a dictionary of the product summary of the queried product (excluding admin businesses)"""
 
+        key = self._normalize_query(product_query)
+        cached = self.summary_cache.get(key)
+        if cached is not None:
+            print(f"[SEARCH] Summary cache hit for query: {product_query}")
+            return cached
+
+        # Search once up front: a failed search raises here instead of caching an all-zero summary
+        self._search_products(product_query)
+
         product_summary = {}
 
         product_summary['product_business_number'] = self.product_by_business(product_query)
@@ -812,4 +1324,5 @@ class Products(Clients):
         product_summary['product_sales_growth'] = self.product_sales_growth(product_query)
         product_summary['product_market_share'] = self.product_market_share(product_query)
 
+        self.summary_cache.set(key, product_summary)
         return product_summary
\ No newline at end of file
@@ -0,0 +1,148 @@
+"""
+Prompt Compactor Module
+Summarizes a DataFrame as per-column statistics plus a few sample rows for insight prompts
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+from rate_limiter import estimate_tokens
+
+UUID_PATTERN = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$', re.IGNORECASE)
+URL_PATTERN = re.compile(r'^(https?://|www\.)', re.IGNORECASE)
+
+
+class TablePromptCompactor:
+    """
+    Turns a table into a compact text block: row count, one line of statistics per column
+    and an evenly spaced sample of rows. Identifier-like columns (UUIDs, URLs, unique ids)
+    are dropped. compact() shrinks the sample and the value lists until the text fits a token budget.
+    """
+
+    def __init__(self, sample_rows=5, top_values=5, max_text_length=80):
+        self.sample_rows = sample_rows
+        self.top_values = top_values
+        self.max_text_length = max_text_length
+
+    def _looks_like_identifier(self, name, series):
+        """True for columns that carry no signal for the model: UUIDs, URLs and unique ids"""
+        values = series.dropna()
+        if values.empty:
+            return False
+
+        if values.dtype == object:
+            sample = values.astype(str).head(50)
+            if sample.map(lambda v: bool(UUID_PATTERN.match(v))).mean() > 0.8:
+                return True
+            if sample.map(lambda v: bool(URL_PATTERN.match(v))).mean() > 0.8:
+                return True
+
+        lowered = name.lower()
+        is_id_name = lowered == 'id' or lowered.endswith('_id')
+        return is_id_name and values.nunique() > 0.9 * len(values)
+
+    def informative_columns(self, df):
+        """Columns kept after dropping identifiers and unhashable (nested JSON) values"""
+        columns = []
+        for column in df.columns:
+            series = df[column]
+            if series.map(lambda v: isinstance(v, (dict, list))).any():
+                continue
+            if not self._looks_like_identifier(str(column), series):
+                columns.append(column)
+        return columns
+
+    def _shorten(self, value):
+        if isinstance(value, float):
+            return round(value, 4)
+        if not isinstance(value, str):
+            return value
+        if len(value) > self.max_text_length:
+            return value[:self.max_text_length] + '…'
+        return value
+
+    def describe_column(self, name, series, top_values):
+        """One line of statistics for a column"""
+        values = series.dropna()
+        missing = len(series) - len(values)
+        prefix = f"- {name}: {len(values)} values, {missing} missing"
+        if values.empty:
+            return prefix
+
+        if pd.api.types.is_bool_dtype(values):
+            return f"{prefix}, true {int(values.sum())} / false {int((~values).sum())}"
+
+        if pd.api.types.is_numeric_dtype(values):
+            return (f"{prefix}, min {values.min():g}, max {values.max():g}, "
+                    f"mean {values.mean():.4g}, median {values.median():.4g}, sum {values.sum():.4g}")
+
+        if str(name).endswith('_at') or 'date' in str(name).lower():
+            dates = pd.to_datetime(values, errors='coerce', utc=True).dropna()
+            if len(dates) > 0.8 * len(values):
+                per_day = dates.dt.date.value_counts()
+                return (f"{prefix}, from {dates.min():%Y-%m-%d %H:%M} to {dates.max():%Y-%m-%d %H:%M}, "
+                        f"{len(per_day)} distinct days, busiest {per_day.index[0]} ({per_day.iloc[0]} rows)")
+
+        counts = values.astype(str).value_counts()
+        top = ', '.join(f"{self._shorten(str(value))} ({count})" for value, count in counts.head(top_values).items())
+        return f"{prefix}, {len(counts)} distinct, top: {top}"
+
+    def sample(self, df, rows):
+        """Evenly spaced rows so the sample spans the whole (time-ordered) table"""
+        if rows <= 0 or df.empty:
+            return []
+        positions = np.unique(np.linspace(0, len(df) - 1, num=min(rows, len(df))).astype(int))
+        sample = df.iloc[positions]
+        return [
+            {column: self._shorten(value) for column, value in record.items() if pd.notna(value)}
+            for record in sample.to_dict(orient='records')
+        ]
+
+    def _row_count_line(self, df):
+        """Row count header; says so when the table was cut short before it got here (df.attrs)"""
+        if not df.attrs.get('truncated'):
+            return f"{len(df)} rows. Column statistics:"
+
+        total = df.attrs.get('total_rows')
+        of_total = f"{total} rows in the period" if total else "more rows in the period (exact number unknown)"
+        return (f"TRUNCATED: only the newest {len(df)} of {of_total} are included. "
+                f"Counts, sums and averages below cover these {len(df)} rows only, not the whole table. "
+                f"Column statistics:")
+
+    def describe(self, df, sample_rows=None, top_values=None):
+        """Statistics and sample for a table as prompt text"""
+        if df is None or df.empty:
+            return "No data available."
+
+        sample_rows = self.sample_rows if sample_rows is None else sample_rows
+        top_values = self.top_values if top_values is None else top_values
+        columns = self.informative_columns(df)
+        df = df[columns]
+
+        lines = [self._row_count_line(df)]
+        lines.extend(self.describe_column(column, df[column], top_values) for column in columns)
+
+        rows = self.sample(df, sample_rows)
+        if rows:
+            lines.append(f"Sample rows ({len(rows)}):")
+            lines.extend(str(row) for row in rows)
+        return '\n'.join(lines)
+
+    def compact(self, df, token_budget):
+        """
+        Like describe(), reducing the sample and then the top-value lists until the text
+        fits token_budget. Column statistics are cut last, by truncating the text.
+        """
+        sample_rows, top_values = self.sample_rows, self.top_values
+        text = self.describe(df, sample_rows, top_values)
+        while estimate_tokens(text) > token_budget and (sample_rows > 0 or top_values > 1):
+            if sample_rows > 0:
+                sample_rows -= 1
+            else:
+                top_values -= 1
+            text = self.describe(df, sample_rows, top_values)
+
+        if estimate_tokens(text) > token_budget:
+            text = text[:token_budget * 4] + '\n[truncated]'
+        return text
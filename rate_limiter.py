@@ -0,0 +1,87 @@
+"""
+Rate Limiter Module
+Token-bucket limits for OpenAI requests/tokens per minute and retry with jittered backoff
+"""
+import random
+import threading
+import time
+
+from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+
+RETRYABLE_ERRORS = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+
+
+class TokenBucket:
+    """Refills continuously up to `capacity`; acquire() blocks until enough is available"""
+
+    def __init__(self, capacity, refill_per_second):
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self._available = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._available = min(self.capacity, self._available + (now - self._updated_at) * self.refill_per_second)
+        self._updated_at = now
+
+    def acquire(self, amount=1):
+        """Takes `amount` from the bucket, sleeping until it has refilled enough"""
+        amount = min(float(amount), self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self._available >= amount:
+                    self._available -= amount
+                    return
+                wait = (amount - self._available) / self.refill_per_second
+            time.sleep(wait)
+
+
+class RateLimiter:
+    """Applies both a requests-per-minute and a tokens-per-minute budget"""
+
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute / 60.0)
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60.0)
+
+    def acquire(self, estimated_tokens):
+        self.requests.acquire(1)
+        self.tokens.acquire(estimated_tokens)
+
+
+def estimate_tokens(text, completion_tokens=0):
+    """Rough token estimate (about four characters per token) used for budgeting"""
+    return len(text or '') // 4 + completion_tokens
+
+
+def _retry_after_seconds(error):
+    """Reads a Retry-After header from an OpenAI error, if the API sent one"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        return float(headers.get('retry-after'))
+    except (TypeError, ValueError):
+        return None
+
+
+def call_with_retries(func, max_retries=5, base_delay=1.0, max_delay=30.0):
+    """
+    Calls func(), retrying rate-limit, timeout, connection and 5xx errors with
+    full-jitter exponential backoff. The last error is re-raised once retries run out.
+    """
+    attempt = 0
+    while True:
+        try:
+            return func()
+        except RETRYABLE_ERRORS as e:
+            if attempt >= max_retries:
+                raise
+
+            delay = _retry_after_seconds(e)
+            if delay is None:
+                delay = random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+            attempt += 1
+            print(f"  ⚠ {type(e).__name__}, retry {attempt}/{max_retries} in {delay:.1f}s")
+            time.sleep(delay)
@@ -29,4 +29,47 @@ class SettingsManager:
         self.product_performance_by = 'volume'
         self.summariy_activity_days = 2
         self.summary_activity_tables = ['users', 'businesses', 'withdrawals']
-        
\ No newline at end of file
+        self.typeahead_limit = 8
+        self.typeahead_refresh_minutes = 15
+        self.product_index_refresh_minutes = 30
+        self.product_index_page_size = 1000
+        self.similar_products_limit = 20
+        self.duplicate_product_threshold = 0.6
+        self.search_cache_size = 256
+        self.search_cache_ttl_seconds = 300  # Normalization runs outside the web workers; this TTL is what expires their stale searches
+        self.open_ai_requests_per_minute = 500
+        self.open_ai_tokens_per_minute = 200000
+        self.open_ai_max_retries = 5
+        self.normalization_workers = 8
+        self.classification_cache_path = 'classification_cache.sqlite3'
+        self.classification_batch_size = 20
+        self.normalization_write_batch_size = 500
+        self.normalization_flush_seconds = 5
+        self.insight_workers = 8
+        self.insight_timeout_seconds = 90
+        self.insight_job_workers = 1
+        self.insight_prompt_token_budget = 1500
+        self.insight_sample_rows = 5
+        self.table_schema_cache_minutes = 60
+        self.table_extract_cache_minutes = 10
+        self.insight_row_limit = 1000
+        self.analysis_plan_cache_path = 'analysis_plan_cache.sqlite3'
+        self.custom_analysis_offline = False
+        self.llm_backend = os.getenv('LLM_BACKEND', 'openai')
+        self.fake_llm_latency_seconds = 0.5
+        self.fake_llm_error_rate = 0.0
+        # USD per million (prompt, completion) tokens, for the AI usage report
+        self.llm_prices_per_million = {
+            'gpt-3.5-turbo': (0.50, 1.50),
+            'gpt-5-nano': (0.05, 0.40),
+        }
+        self.clean_chunk_rows = 50000
+        self.clean_streaming_min_mb = 25
+        self.type_inference_sample_rows = 1000
+        self.parallel_cleaning = True
+        self.parallel_clean_min_columns = 100
+        self.parallel_clean_min_cells = 1000000
+        self.parallel_clean_workers = None  # None = one per CPU
+        self.category_max_unique_ratio = 0.5
+        self.keep_arrow_dtypes = False  # Parquet/Arrow uploads keep Arrow-backed columns through cleaning
+        self.product_suggestion_min_score = 0.3
@@ -0,0 +1,126 @@
+"""
+Spell Corrector Module
+SymSpell-style query correction using a precomputed deletion dictionary
+"""
+import re
+
+from product_classifier import ProductClassifier
+
+
+class SpellCorrector:
+    """
+    Corrects misspelled words against a known vocabulary.
+    Every vocabulary word is stored under all of its deletions up to max_distance,
+    so a lookup only generates the deletions of the query word and lookups are
+    independent of the vocabulary size.
+    """
+
+    TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+    def __init__(self, max_distance=2, prefix_length=7):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.words = {}        # word -> frequency
+        self.deletes = {}      # deletion -> set of words
+
+    def __len__(self):
+        return len(self.words)
+
+    def add_word(self, word, frequency=1):
+        """Adds a word to the vocabulary and indexes its deletions"""
+        word = word.lower().strip()
+        if not word:
+            return
+
+        if word in self.words:
+            self.words[word] += frequency
+            return
+        self.words[word] = frequency
+
+        for deletion in self._deletions(word[:self.prefix_length]):
+            self.deletes.setdefault(deletion, set()).add(word)
+
+    def add_text(self, text, frequency=1):
+        """Adds every word of a phrase such as 'solar panel' or 'solar_panel'"""
+        for word in self.TOKEN_PATTERN.findall((text or '').lower().replace('_', ' ')):
+            self.add_word(word, frequency)
+
+    def _deletions(self, word):
+        """All strings reachable from word by removing up to max_distance characters"""
+        result = {word}
+        frontier = {word}
+        for _ in range(self.max_distance):
+            next_frontier = set()
+            for item in frontier:
+                if len(item) <= 1:
+                    continue
+                for i in range(len(item)):
+                    next_frontier.add(item[:i] + item[i + 1:])
+            result |= next_frontier
+            frontier = next_frontier
+        return result
+
+    @staticmethod
+    def _distance(a, b):
+        """Damerau-Levenshtein (optimal string alignment) distance"""
+        previous_previous = None
+        previous = list(range(len(b) + 1))
+        for i in range(1, len(a) + 1):
+            current = [i] + [0] * len(b)
+            for j in range(1, len(b) + 1):
+                cost = 0 if a[i - 1] == b[j - 1] else 1
+                current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+                if (i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                    current[j] = min(current[j], previous_previous[j - 2] + 1)
+            previous_previous, previous = previous, current
+        return previous[len(b)]
+
+    def correct_word(self, word):
+        """Returns the closest known word (most frequent on ties), or the word itself"""
+        word = word.lower()
+        if word in self.words or len(word) < 3 or word.isdigit():
+            return word
+
+        candidates = set()
+        for deletion in self._deletions(word[:self.prefix_length]):
+            candidates |= self.deletes.get(deletion, set())
+
+        # Short words only tolerate one edit, otherwise 'sofa' could become 'soap'
+        max_distance = 1 if len(word) <= 4 else self.max_distance
+
+        best, best_key = word, None
+        for candidate in candidates:
+            distance = self._distance(word, candidate)
+            if distance > max_distance:
+                continue
+            key = (distance, -self.words[candidate])
+            if best_key is None or key < best_key:
+                best, best_key = candidate, key
+        return best
+
+    def correct(self, query):
+        """
+        Corrects every word of a query.
+        Returns (corrected query, True if anything changed).
+        """
+        normalized = ' '.join(self.TOKEN_PATTERN.findall((query or '').lower()))
+        if not normalized:
+            return query, False
+
+        # Hyphenated or split words ('head-phones') are tried joined up first
+        joined = normalized.replace(' ', '')
+        if ' ' in normalized and joined in self.words:
+            return joined, True
+
+        corrected = ' '.join(self.correct_word(word) for word in normalized.split())
+        return corrected, corrected != normalized
+
+    @classmethod
+    def from_classifier(cls, **kwargs):
+        """Builds a corrector seeded with the ProductClassifier types and keywords"""
+        corrector = cls(**kwargs)
+        for product_type, keywords in ProductClassifier.PRODUCT_MAPPINGS.items():
+            corrector.add_text(product_type)
+            for keyword in keywords:
+                corrector.add_text(keyword)
+        return corrector
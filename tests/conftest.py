@@ -0,0 +1,28 @@
+"""
+Shared test setup: puts the app modules on the path and configures an offline
+environment (fake LLM backend, placeholder Supabase credentials) before they are imported.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ['LLM_BACKEND'] = 'fake'
+os.environ.setdefault('SUPABASE_URL', 'http://localhost:54321')
+os.environ.setdefault('SERVICE_ROLE_KEY', 'tests')
+os.environ.pop('ADMIN_USER', None)
+
+
+@pytest.fixture(scope='session')
+def products_manager(tmp_path_factory):
+    """The Products singleton, with its SQLite caches in a temporary directory."""
+    from settings import SettingsManager
+    from products import Products
+
+    settings_manager = SettingsManager()
+    cache_dir = tmp_path_factory.mktemp('caches')
+    settings_manager.classification_cache_path = str(cache_dir / 'classification.sqlite3')
+    settings_manager.analysis_plan_cache_path = str(cache_dir / 'plans.sqlite3')
+    return Products()
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis_plan_cache import AnalysisPlanCache
+from file_processor import FileCleaner
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return AnalysisPlanCache(str(tmp_path / 'plans.sqlite3'))
+
+
+def export(quantity_max, price_step, region_count, rows=400):
+    """One month of a recurring export; only the value ranges change between months."""
+    rng = np.random.default_rng(quantity_max)
+    return pd.DataFrame({
+        'date': pd.date_range('2024-01-01', periods=rows, freq='h'),
+        'region': [f'region {i % region_count}' for i in range(rows)],
+        'quantity': rng.integers(101, quantity_max, rows),
+        'unit_price': np.round(rng.uniform(100, 900, rows) / price_step) * price_step,
+    })
+
+
+def test_compacted_dtypes_do_not_change_the_fingerprint(cache):
+    cleaner = FileCleaner()
+    january = cleaner.compact_dtypes(export(quantity_max=127, price_step=0.5, region_count=4))
+    february = cleaner.compact_dtypes(export(quantity_max=300, price_step=0.01, region_count=400))
+
+    # Same columns, but the data picked different compact dtypes
+    assert [str(dtype) for dtype in january.dtypes] != [str(dtype) for dtype in february.dtypes]
+    assert cache.fingerprint(january, {}) == cache.fingerprint(february, {})
+
+
+def test_column_kinds_are_part_of_the_fingerprint(cache):
+    df = pd.DataFrame({'amount': [1, 2, 3]})
+
+    assert cache.fingerprint(df, {}) == cache.fingerprint(df.astype('int16'), {})
+    assert cache.fingerprint(df, {}) != cache.fingerprint(df.astype(float), {})
+    assert cache.fingerprint(df, {}) != cache.fingerprint(df.astype(str), {})
+
+
+def test_plans_round_trip(cache):
+    df = pd.DataFrame({'amount': [1, 2, 3]})
+    fingerprint = cache.fingerprint(df, {})
+    cache.set(fingerprint, {'analyses': []}, df.columns)
+
+    assert cache.get(fingerprint) == {'analyses': []}
+    assert cache.get('missing') is None
+    assert cache.stats()['hits'] == 1
@@ -0,0 +1,60 @@
+import os
+
+import pandas as pd
+import pytest
+
+from file_processor import FileCleaner
+
+
+MESSY_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'messy_sales_data.csv')
+
+
+@pytest.fixture(scope='module')
+def cleaner():
+    return FileCleaner()
+
+
+@pytest.fixture(scope='module')
+def whole_file(cleaner):
+    return cleaner.clean_all(pd.read_csv(MESSY_CSV)).reset_index(drop=True)
+
+
+@pytest.mark.parametrize('chunk_rows', [100, 173, 1000])
+def test_chunked_cleaning_matches_whole_file(cleaner, whole_file, chunk_rows):
+    chunked = cleaner.clean_csv_in_chunks(MESSY_CSV, chunk_rows=chunk_rows)
+
+    pd.testing.assert_frame_equal(chunked, whole_file)
+
+
+def test_duplicates_are_removed_across_chunks(cleaner, whole_file):
+    raw = pd.read_csv(MESSY_CSV)
+    chunked = cleaner.clean_csv_in_chunks(MESSY_CSV, chunk_rows=50)
+
+    assert len(chunked) == len(whole_file) < len(raw)
+    assert not chunked.duplicated().any()
+
+
+def test_written_csv_matches_whole_file(cleaner, whole_file, tmp_path):
+    output = tmp_path / 'clean.csv'
+    rows = cleaner.write_clean_csv(MESSY_CSV, output, chunk_rows=100)
+
+    expected = tmp_path / 'expected.csv'
+    whole_file.to_csv(expected, index=False)
+    assert rows == len(whole_file)
+    assert output.read_text() == expected.read_text()
+
+
+def test_process_pool_profiles_match_serial(cleaner, monkeypatch):
+    import file_processor
+
+    raw = pd.read_csv(MESSY_CSV)
+    wide = pd.concat([raw.add_suffix(f'_{i}') for i in range(4)], axis=1)
+    serial = cleaner.clean_all(wide.copy())
+
+    monkeypatch.setattr(file_processor.os, 'cpu_count', lambda: 2)
+    monkeypatch.setattr(file_processor.settings_manager, 'parallel_cleaning', True)
+    monkeypatch.setattr(file_processor.settings_manager, 'parallel_clean_min_columns', 10)
+    monkeypatch.setattr(file_processor.settings_manager, 'parallel_clean_min_cells', 1000)
+    assert cleaner._use_process_pool(wide)
+
+    pd.testing.assert_frame_equal(cleaner.clean_all(wide.copy()), serial)
@@ -0,0 +1,11 @@
+from llm_backend import FakeLLMClient, create_llm_client
+
+
+def test_openai_client_leaves_retries_to_call_with_retries():
+    client = create_llm_client('openai', api_key='test-key')
+
+    assert client.max_retries == 0
+
+
+def test_fake_backend():
+    assert isinstance(create_llm_client('fake'), FakeLLMClient)
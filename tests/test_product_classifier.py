@@ -0,0 +1,30 @@
+import pytest
+
+from product_classifier import ProductClassifier
+
+
+@pytest.mark.parametrize('name', [
+    'Samsung 55 inch TV',
+    'Car Brake Pads',
+    'Phone Case',
+    'Laptop Bag',
+    'USB Cable',
+])
+def test_ambiguous_names_are_left_for_the_ai(name):
+    assert ProductClassifier.classify_name(name) is None
+
+
+def test_name_without_keywords_is_unclassified():
+    assert ProductClassifier.classify_name('Assorted items') is None
+    assert ProductClassifier.classify_name(None) is None
+
+
+@pytest.mark.parametrize('name, product_type', [
+    ('Dell Latitude Laptop', 'laptop'),
+    ('Samsung Galaxy Phone', 'phone'),
+    ('Mountain Bicycle', 'bicycle'),
+    # The longer keyword wins, so 'cycle' does not also count as a bicycle
+    ('Deep Cycle Battery 200Ah', 'battery'),
+])
+def test_single_unambiguous_keyword_is_classified(name, product_type):
+    assert ProductClassifier.classify_name(name) == product_type
@@ -0,0 +1,72 @@
+import pytest
+
+from product_dedup import ProductDeduplicator
+
+
+PRODUCTS = [
+    {'id': 1, 'name': 'Samsung Galaxy A15 128GB Black', 'description': 'Smartphone with 6.5 inch display'},
+    {'id': 2, 'name': 'Samsung Galaxy A15 128GB - Black', 'description': 'Smartphone with 6.5 inch display'},
+    {'id': 3, 'name': 'samsung galaxy a15 128gb black', 'description': 'smartphone, 6.5 inch display'},
+    {'id': 4, 'name': 'Hisense 43 inch Smart TV', 'description': 'Full HD LED television'},
+    {'id': 5, 'name': 'Deep Cycle Solar Battery 200Ah', 'description': 'Gel battery for inverters'},
+]
+
+
+def test_near_duplicates_share_a_cluster():
+    dedup = ProductDeduplicator()
+    dedup.rebuild(PRODUCTS)
+
+    assert dedup.cluster_ids[1] == dedup.cluster_ids[2] == dedup.cluster_ids[3]
+    assert dedup.cluster_ids[4] != dedup.cluster_ids[1]
+    assert dedup.cluster_ids[5] not in (dedup.cluster_ids[1], dedup.cluster_ids[4])
+
+
+def test_cluster_id_is_the_smallest_member_id():
+    dedup = ProductDeduplicator()
+    dedup.rebuild(list(reversed(PRODUCTS)))
+
+    assert dedup.cluster_ids[3] == '1'
+    assert dedup.cluster_ids[4] == '4'
+
+
+def test_clusters_only_returns_groups_of_min_size():
+    dedup = ProductDeduplicator()
+    dedup.rebuild(PRODUCTS)
+
+    clusters = dedup.clusters()
+    assert list(clusters) == ['1']
+    assert sorted(row['id'] for row in clusters['1']) == [1, 2, 3]
+    assert len(dedup.clusters(min_size=1)) == 3
+
+
+def test_signature_similarity_estimates_jaccard():
+    dedup = ProductDeduplicator(num_perm=128, bands=32)
+    same = dedup.signature(dedup.shingles(PRODUCTS[0]))
+    near = dedup.signature(dedup.shingles(PRODUCTS[1]))
+    other = dedup.signature(dedup.shingles(PRODUCTS[4]))
+
+    assert dedup.similarity(same, same) == 1.0
+    assert dedup.similarity(same, near) > 0.8
+    assert dedup.similarity(same, other) < 0.2
+
+
+def test_rows_without_id_or_text_are_skipped():
+    dedup = ProductDeduplicator()
+    dedup.rebuild([{'name': 'No id'}, {'id': 7, 'name': '', 'description': None}, PRODUCTS[0]])
+
+    assert list(dedup.cluster_ids) == [1]
+
+
+def test_bands_must_divide_permutations():
+    with pytest.raises(ValueError):
+        ProductDeduplicator(num_perm=64, bands=10)
+
+
+def test_cluster_lookups():
+    dedup = ProductDeduplicator()
+    dedup.rebuild(PRODUCTS)
+
+    assert dedup.cluster_id(2) == '1'
+    assert dedup.cluster_id(99) is None
+    assert sorted(row['id'] for row in dedup.cluster_members('1')) == [1, 2, 3]
+    assert dedup.cluster_count() == 3
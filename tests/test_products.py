@@ -0,0 +1,153 @@
+import threading
+from datetime import datetime
+
+import pytest
+
+from spell_corrector import SpellCorrector
+
+
+REAL_WORDS = ['router', 'sugar', 'honey', 'printer', 'beans', 'cooking oil']
+
+
+@pytest.fixture
+def products(products_manager, monkeypatch):
+    """Products with the background index refresh disabled and an empty product table."""
+    monkeypatch.setattr(products_manager, '_refresh_product_index_in_background', lambda: None)
+    monkeypatch.setattr(products_manager, '_search_products', lambda query: [])
+    return products_manager
+
+
+def load_vocabulary(products, monkeypatch, *product_types):
+    """Simulates a finished database load with the given ai_name values."""
+    corrector = SpellCorrector.from_classifier()
+    for product_type in product_types:
+        corrector.add_text(product_type)
+    monkeypatch.setattr(products, 'spell_corrector', corrector)
+    monkeypatch.setattr(products, '_product_index_loaded_at', datetime.utcnow())
+
+
+@pytest.mark.parametrize('query', REAL_WORDS)
+def test_nothing_is_corrected_before_the_vocabulary_loads(products, monkeypatch, query):
+    monkeypatch.setattr(products, '_product_index_loaded_at', None)
+
+    assert products.correct_product_query(query) is None
+    assert products.resolve_product_query(query) == (query, None, None)
+
+
+@pytest.mark.parametrize('query', REAL_WORDS)
+def test_real_words_with_products_are_searched_as_typed(products, monkeypatch, query):
+    load_vocabulary(products, monkeypatch, 'trouser', 'solar_panel', 'phone', 'grinder', 'beats', 'cooling_oil')
+    monkeypatch.setattr(products, '_search_products', lambda q: [{'id': 1}] if q == query else [])
+
+    search_query, corrected, _ = products.resolve_product_query(query)
+
+    assert (search_query, corrected) == (query, None)
+
+
+def test_correction_of_a_query_with_matches_is_only_offered(products, monkeypatch):
+    load_vocabulary(products, monkeypatch, 'trouser')
+    monkeypatch.setattr(products, '_search_products', lambda q: [{'id': 1}])
+
+    assert products.resolve_product_query('router') == ('router', None, 'trouser')
+
+
+def test_known_words_are_not_corrected(products, monkeypatch):
+    load_vocabulary(products, monkeypatch, *REAL_WORDS)
+
+    for query in REAL_WORDS:
+        assert products.correct_product_query(query) is None
+
+
+def test_correction_is_searched_when_the_query_finds_nothing(products, monkeypatch):
+    load_vocabulary(products, monkeypatch, 'phone')
+    monkeypatch.setattr(products, '_search_products', lambda q: [{'id': 1}] if q == 'phone' else [])
+
+    assert products.resolve_product_query('phnoe') == ('phone', 'phone', None)
+
+
+def test_original_query_is_kept_when_neither_finds_anything(products, monkeypatch):
+    load_vocabulary(products, monkeypatch, 'phone')
+
+    assert products.resolve_product_query('phnoe') == ('phnoe', None, None)
+
+
+class FailingSupabase:
+    """Supabase client whose every call fails, like during an outage."""
+
+    def rpc(self, *args, **kwargs):
+        raise ConnectionError("supabase unavailable")
+
+    def table(self, name):
+        raise ConnectionError("supabase unavailable")
+
+
+def test_failed_searches_are_not_cached(products_manager, monkeypatch):
+    monkeypatch.setattr(products_manager, 'supabase_client', FailingSupabase())
+    products_manager.search_cache.clear()
+    products_manager.summary_cache.clear()
+
+    with pytest.raises(ConnectionError):
+        products_manager.product_information_summary('battery')
+
+    assert products_manager.search_cache.get('battery') is None
+    assert products_manager.summary_cache.get('battery') is None
+
+
+ROWS = [
+    {'name': 'Mystery gadget', 'category': 'Electronics', 'description': ''},
+    {'name': 'Unlabelled item', 'category': 'Home Goods', 'description': ''},
+]
+
+
+def test_failed_batch_request_does_not_fan_out(products_manager, monkeypatch):
+    def fail(request, max_retries=None):
+        raise ConnectionError("rate limited")
+
+    single_calls = []
+    monkeypatch.setattr('products.call_with_retries', fail)
+    monkeypatch.setattr(products_manager, 'ai_product_naming',
+                        lambda *args: single_calls.append(args) or 'gadget')
+
+    assert products_manager.ai_product_naming_batch(ROWS) is None
+    results = products_manager._classify_with_ai(ROWS)
+
+    assert single_calls == []
+    assert [(product_type, tier) for _, product_type, tier in results] == [
+        ('electronics', 'fallback'), ('home', 'fallback')
+    ]
+
+
+def test_invalid_batch_entries_are_retried_one_by_one(products_manager, monkeypatch):
+    single_calls = []
+    monkeypatch.setattr(products_manager, 'ai_product_naming_batch', lambda rows: {0: 'gadget'})
+    monkeypatch.setattr(products_manager, 'ai_product_naming',
+                        lambda name, *args: single_calls.append(name) or 'homeware')
+
+    results = products_manager._classify_with_ai(ROWS)
+
+    assert single_calls == ['Unlabelled item']
+    assert [(product_type, tier) for _, product_type, tier in results] == [
+        ('gadget', 'ai_batch'), ('homeware', 'ai')
+    ]
+
+
+def test_suggestions_never_load_the_index_on_the_request_path(products_manager, monkeypatch):
+    release = threading.Event()
+    rebuilds = []
+
+    def slow_rebuild():
+        rebuilds.append(threading.current_thread().name)
+        release.wait(5)
+
+    monkeypatch.setattr(products_manager, '_product_index_loaded_at', None)
+    monkeypatch.setattr(products_manager, '_rebuild_product_index', slow_rebuild)
+
+    # Served from the (still empty) index while one background rebuild runs
+    assert products_manager.suggest_product_types('phnoe') == []
+    assert products_manager.suggest_product_types('lapotp') == []
+    release.set()
+    for thread in threading.enumerate():
+        if thread.name == 'product-index-refresh':
+            thread.join(5)
+
+    assert rebuilds == ['product-index-refresh']
@@ -0,0 +1,65 @@
+import pytest
+
+import rate_limiter
+from rate_limiter import RateLimiter, TokenBucket, estimate_tokens
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake monotonic clock; sleeping advances it instead of blocking, and each sleep is recorded."""
+    state = {'now': 0.0, 'sleeps': []}
+
+    def sleep(seconds):
+        state['sleeps'].append(seconds)
+        state['now'] += seconds
+
+    monkeypatch.setattr(rate_limiter.time, 'monotonic', lambda: state['now'])
+    monkeypatch.setattr(rate_limiter.time, 'sleep', sleep)
+    return state
+
+
+def test_full_bucket_does_not_wait(clock):
+    bucket = TokenBucket(capacity=10, refill_per_second=1)
+    for _ in range(10):
+        bucket.acquire()
+
+    assert clock['sleeps'] == []
+
+
+def test_empty_bucket_waits_for_refill(clock):
+    bucket = TokenBucket(capacity=2, refill_per_second=4)
+    bucket.acquire(2)
+    bucket.acquire(1)
+
+    assert clock['sleeps'] == [pytest.approx(0.25)]
+
+
+def test_refill_is_capped_at_capacity(clock):
+    bucket = TokenBucket(capacity=5, refill_per_second=1)
+    bucket.acquire(5)
+    clock['now'] += 100
+    bucket.acquire(5)
+    bucket.acquire(1)
+
+    assert clock['sleeps'] == [pytest.approx(1.0)]
+
+
+def test_requests_larger_than_capacity_are_capped(clock):
+    bucket = TokenBucket(capacity=100, refill_per_second=10)
+    bucket.acquire(500)
+
+    assert clock['sleeps'] == []
+
+
+def test_rate_limiter_applies_both_budgets(clock):
+    limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=600)
+    limiter.acquire(600)
+    limiter.acquire(300)
+
+    # One request per second is still available; the token budget needs 30s to refill 300 tokens
+    assert sum(clock['sleeps']) == pytest.approx(30.0)
+
+
+def test_estimate_tokens():
+    assert estimate_tokens('x' * 400) == 100
+    assert estimate_tokens(None, completion_tokens=50) == 50
@@ -0,0 +1,69 @@
+import pytest
+
+import result_cache
+from result_cache import ResultCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replaces the cache's monotonic clock with one the test advances by hand."""
+    now = [1000.0]
+    monkeypatch.setattr(result_cache.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_get_returns_stored_value_and_counts_hits(clock):
+    cache = ResultCache(maxsize=4, ttl_seconds=60)
+    cache.set('phones', ['a'])
+
+    assert cache.get('phones') == ['a']
+    assert cache.get('laptops') is None
+    assert cache.stats() == {'size': 1, 'maxsize': 4, 'hits': 1, 'misses': 1, 'hit_rate': 0.5}
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = ResultCache(maxsize=2, ttl_seconds=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')          # 'b' is now the least recently used
+    cache.set('c', 3)
+
+    assert len(cache) == 2
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = ResultCache(maxsize=4, ttl_seconds=60)
+    cache.set('a', 1)
+
+    clock[0] += 60
+    assert cache.get('a') == 1
+
+    clock[0] += 1
+    assert cache.get('a') is None
+    assert len(cache) == 0
+
+
+def test_setting_again_refreshes_value_and_expiry(clock):
+    cache = ResultCache(maxsize=4, ttl_seconds=60)
+    cache.set('a', 1)
+    clock[0] += 50
+    cache.set('a', 2)
+    clock[0] += 50
+
+    assert cache.get('a') == 2
+
+
+def test_invalidate_drops_matching_keys(clock):
+    cache = ResultCache(maxsize=8, ttl_seconds=60)
+    for key in [('search', 'phone'), ('search', 'tv'), ('similar', 'phone')]:
+        cache.set(key, key)
+
+    assert cache.invalidate(lambda key: key[1] == 'phone') == 2
+    assert cache.get(('search', 'tv')) == ('search', 'tv')
+    assert cache.get(('search', 'phone')) is None
+
+    cache.clear()
+    assert len(cache) == 0
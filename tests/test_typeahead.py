@@ -0,0 +1,91 @@
+import threading
+import time
+
+from typeahead import PrefixTrie, Typeahead
+
+
+def build_trie(terms, top_k=10):
+    trie = PrefixTrie(top_k=top_k)
+    for term, weight in terms:
+        trie.insert(term, weight)
+    trie.finalize()
+    return trie
+
+
+def test_completes_most_popular_first():
+    trie = build_trie([('Phone', 5), ('Phone Case', 9), ('Photo Frame', 2), ('Laptop', 7)])
+
+    assert trie.complete('ph') == ['Phone Case', 'Phone', 'Photo Frame']
+    assert trie.complete('lap') == ['Laptop']
+
+
+def test_prefix_ending_inside_an_edge():
+    trie = build_trie([('charger', 1), ('chair', 3)])
+
+    # 'cha' is the shared edge; 'char' and 'chai' end part-way along the split edges
+    assert trie.complete('cha') == ['chair', 'charger']
+    assert trie.complete('char') == ['charger']
+    assert trie.complete('chai') == ['chair']
+
+
+def test_lookup_is_case_and_whitespace_insensitive():
+    trie = build_trie([('Solar Panel', 1)])
+
+    assert trie.complete('  SOLAR p ') == ['Solar Panel']
+
+
+def test_unknown_prefix_returns_nothing():
+    trie = build_trie([('tv', 1), ('tablet', 1)])
+
+    assert trie.complete('x') == []
+    assert trie.complete('tvs') == []
+    assert trie.complete('tab!') == []
+
+
+def test_repeated_inserts_accumulate_weight():
+    trie = build_trie([('fridge', 1), ('freezer', 2), ('fridge', 2)])
+
+    assert trie.size == 2
+    assert trie.complete('fr') == ['fridge', 'freezer']
+
+
+def test_blank_terms_are_ignored():
+    trie = build_trie([('', 1), ('   ', 1), (None, 1), ('kettle', 1)])
+
+    assert trie.size == 1
+    assert trie.complete('') == ['kettle']
+
+
+def test_results_are_limited_to_top_k():
+    trie = build_trie([(f'item {i:02d}', i) for i in range(20)], top_k=5)
+
+    assert trie.complete('item') == ['item 19', 'item 18', 'item 17', 'item 16', 'item 15']
+    assert trie.complete('item', limit=2) == ['item 19', 'item 18']
+
+
+def test_stale_tries_are_rebuilt_in_the_background(monkeypatch):
+
+    typeahead = Typeahead()
+    release = threading.Event()
+    rebuilds = []
+
+    def slow_refresh():
+        rebuilds.append(threading.current_thread().name)
+        release.wait(5)
+        typeahead._tries = {'products': build_trie([('phone case', 2)])}
+        typeahead._built_at = time.time()
+
+    monkeypatch.setattr(typeahead, '_tries', {'products': build_trie([('phone', 1)])})
+    monkeypatch.setattr(typeahead, '_built_at', 0.0)
+    monkeypatch.setattr(typeahead, 'refresh', slow_refresh)
+
+    # The old tries keep answering while one rebuild runs
+    assert typeahead.suggest('products', 'ph') == ['phone']
+    assert typeahead.suggest('products', 'ph') == ['phone']
+    release.set()
+    for thread in threading.enumerate():
+        if thread.name == 'typeahead-refresh':
+            thread.join(5)
+
+    assert rebuilds == ['typeahead-refresh']
+    assert typeahead.suggest('products', 'ph') == ['phone case']
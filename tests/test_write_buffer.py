@@ -0,0 +1,70 @@
+from write_buffer import BulkUpdateBuffer
+
+
+class RecordingQuery:
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+
+    def update(self, values, **kwargs):
+        self.values = values
+        return self
+
+    def in_(self, column, keys):
+        self.column, self.keys = column, keys
+        return self
+
+    def execute(self):
+        if self.client.fail_when(self.keys):
+            raise RuntimeError("update failed")
+        self.client.updates.append((self.table, self.values, self.column, sorted(self.keys)))
+
+
+class RecordingSupabase:
+    """Records each UPDATE; fail_when(keys) makes chosen requests fail."""
+
+    def __init__(self, fail_when=lambda keys: False):
+        self.updates = []
+        self.fail_when = fail_when
+
+    def table(self, name):
+        return RecordingQuery(self, name)
+
+
+def test_rows_with_the_same_values_share_one_update():
+    client = RecordingSupabase()
+    buffer = BulkUpdateBuffer(client, 'products', batch_size=10, flush_interval=60)
+    for product_id, ai_name in [(1, 'phone'), (2, 'laptop'), (3, 'phone')]:
+        buffer.add({'id': product_id, 'ai_name': ai_name, 'ai_name_updated_at': 't0'})
+    buffer.close()
+
+    assert sorted(client.updates, key=lambda update: update[3]) == [
+        ('products', {'ai_name': 'phone', 'ai_name_updated_at': 't0'}, 'id', [1, 3]),
+        ('products', {'ai_name': 'laptop', 'ai_name_updated_at': 't0'}, 'id', [2]),
+    ]
+    assert buffer.report() == {'written': 3, 'failed': 0, 'requests': 2, 'failures': []}
+
+
+def test_full_batches_are_flushed_and_reported():
+    client = RecordingSupabase()
+    written = []
+    buffer = BulkUpdateBuffer(client, 'products', batch_size=2, flush_interval=60, on_written=written.extend)
+    buffer.add({'id': 1, 'ai_name': 'phone'})
+    buffer.add({'id': 2, 'ai_name': 'phone'})
+
+    assert client.updates == [('products', {'ai_name': 'phone'}, 'id', [1, 2])]
+    assert [row['id'] for row in written] == [1, 2]
+    buffer.close()
+
+
+def test_failed_batch_is_retried_per_row():
+    client = RecordingSupabase(fail_when=lambda keys: len(keys) > 1 or keys == [2])
+    buffer = BulkUpdateBuffer(client, 'products', batch_size=10, flush_interval=60)
+    for product_id in (1, 2, 3):
+        buffer.add({'id': product_id, 'ai_name': 'phone'})
+    buffer.close()
+
+    report = buffer.report()
+    assert (report['written'], report['failed']) == (2, 1)
+    assert report['failures'] == [{'id': 2, 'error': 'update failed'}]
+    assert [keys for _, _, _, keys in client.updates] == [[1], [3]]
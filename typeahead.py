@@ -0,0 +1,263 @@
+"""
+Typeahead Module
+Serves prefix completions for product types, business names and industries from memory
+so the search pages can suggest terms before running a full Supabase search
+"""
+import threading
+import time
+from collections import Counter
+
+from clients import Clients
+from product_classifier import ProductClassifier
+from settings import SettingsManager
+
+settings_manager = SettingsManager()
+
+
+def singleton(cls):
+    """Decorator to ensure only one instance of a class is created"""
+    instances = {}
+
+    def wrapper(*args, **kwargs):
+        if cls not in instances:
+            instances[cls] = cls(*args, **kwargs)
+        return instances[cls]
+
+    return wrapper
+
+
+class _TrieNode:
+    """A node of the compressed trie. Edges are keyed by their first character."""
+
+    __slots__ = ('edges', 'term', 'weight', 'top')
+
+    def __init__(self):
+        self.edges = {}     # first char -> (label, child node)
+        self.term = None    # display value if a term ends here
+        self.weight = 0
+        self.top = []       # best completions below this node as (weight, term)
+
+
+class PrefixTrie:
+    """
+    Compressed (radix) trie over lower-cased keys.
+    Every node caches its top-k completions by popularity, so a lookup only
+    walks the prefix and returns the cached list.
+    """
+
+    def __init__(self, top_k=10):
+        self.top_k = top_k
+        self.root = _TrieNode()
+        self.size = 0
+
+    def insert(self, term, weight=1):
+        """Adds a term, accumulating its weight if it is already present"""
+        if not term or not str(term).strip():
+            return
+
+        term = str(term).strip()
+        key = term.lower()
+        node = self.root
+
+        while key:
+            edge = node.edges.get(key[0])
+            if edge is None:
+                child = _TrieNode()
+                node.edges[key[0]] = (key, child)
+                node = child
+                key = ''
+                break
+
+            label, child = edge
+            common = self._common_prefix_length(label, key)
+
+            if common < len(label):
+                # Split the edge so the shared part becomes its own node
+                middle = _TrieNode()
+                middle.edges[label[common]] = (label[common:], child)
+                node.edges[key[0]] = (label[:common], middle)
+                child = middle
+
+            node = child
+            key = key[common:]
+
+        if node.term is None:
+            node.term = term
+            self.size += 1
+        node.weight += weight
+
+    def finalize(self):
+        """Computes the cached top-k list of every node. Call after the last insert."""
+        self._collect_top(self.root)
+
+    def _collect_top(self, node):
+        candidates = []
+        if node.term is not None:
+            candidates.append((node.weight, node.term))
+        for _, child in node.edges.values():
+            candidates.extend(self._collect_top(child))
+
+        candidates.sort(key=lambda item: (-item[0], item[1]))
+        node.top = candidates[:self.top_k]
+        return node.top
+
+    def complete(self, prefix, limit=None):
+        """Returns up to `limit` terms starting with `prefix`, most popular first"""
+        limit = limit or self.top_k
+        key = (prefix or '').strip().lower()
+        node = self.root
+
+        while key:
+            edge = node.edges.get(key[0])
+            if edge is None:
+                return []
+
+            label, child = edge
+            if key.startswith(label):
+                key = key[len(label):]
+                node = child
+            elif label.startswith(key):
+                # Prefix ends part-way along this edge
+                node = child
+                key = ''
+            else:
+                return []
+
+        return [term for _, term in node.top[:limit]]
+
+    @staticmethod
+    def _common_prefix_length(a, b):
+        length = min(len(a), len(b))
+        i = 0
+        while i < length and a[i] == b[i]:
+            i += 1
+        return i
+
+
+@singleton
+class Typeahead(Clients):
+    """Builds and serves the in-memory autocomplete tries for the search pages"""
+
+    KINDS = ('products', 'businesses', 'industries')
+
+    def __init__(self):
+        super().__init__()
+        self._tries = {}
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+
+    def _product_type_counts(self):
+        """Returns {product type: number of listings} from ai_name plus the classifier types"""
+        counts = Counter()
+
+        try:
+            response = (
+                self.supabase_client.table('products')
+                .select('ai_name, business_id')
+                .execute()
+            )
+            for row in (response.data or []):
+                if row.get('ai_name') and row.get('business_id') not in self.admin_business_ids:
+                    counts[row['ai_name'].replace('_', ' ')] += 1
+        except Exception as e:
+            print(f"[TYPEAHEAD] Failed to load product types: {e}")
+
+        # Known classifier types are always suggestable, even before any listing uses them
+        for product_type in ProductClassifier.get_all_product_types():
+            counts[product_type.replace('_', ' ')] += 0
+
+        return counts
+
+    def _business_counts(self):
+        """Returns ({business name: completed orders}, {industry: number of businesses})"""
+        business_counts = Counter()
+        industry_counts = Counter()
+
+        try:
+            business_response = (
+                self.supabase_client.table('businesses')
+                .select('id, business_name, industry')
+                .execute()
+            )
+            businesses = [
+                b for b in (business_response.data or [])
+                if b.get('id') not in self.admin_business_ids
+            ]
+
+            order_response = (
+                self.supabase_client.table('orders')
+                .select('business_id')
+                .eq('order_status', 'completed')
+                .execute()
+            )
+            orders_per_business = Counter(o.get('business_id') for o in (order_response.data or []))
+
+            for business in businesses:
+                if business.get('business_name'):
+                    business_counts[business['business_name']] += 1 + orders_per_business.get(business['id'], 0)
+                if business.get('industry'):
+                    industry_counts[business['industry']] += 1
+
+        except Exception as e:
+            print(f"[TYPEAHEAD] Failed to load businesses: {e}")
+
+        return business_counts, industry_counts
+
+    def refresh(self):
+        """Rebuilds every trie from Supabase and swaps them in"""
+        start = time.time()
+        top_k = settings_manager.typeahead_limit
+
+        business_counts, industry_counts = self._business_counts()
+        sources = {
+            'products': self._product_type_counts(),
+            'businesses': business_counts,
+            'industries': industry_counts,
+        }
+
+        tries = {}
+        for kind, counts in sources.items():
+            trie = PrefixTrie(top_k=top_k)
+            for term, weight in counts.items():
+                trie.insert(term, weight)
+            trie.finalize()
+            tries[kind] = trie
+
+        self._tries = tries
+        self._built_at = time.time()
+        print(f"[TYPEAHEAD] Built tries in {time.time() - start:.2f}s "
+              f"({', '.join(f'{k}={t.size}' for k, t in tries.items())})")
+
+    def _refresh_in_background(self):
+        """
+        Starts one background rebuild when the tries are missing or older than the configured
+        refresh interval. Requests keep serving the previous tries (none until the first build).
+        """
+        max_age = settings_manager.typeahead_refresh_minutes * 60
+        if self._tries and time.time() - self._built_at < max_age:
+            return
+
+        if not self._lock.acquire(blocking=False):
+            return
+
+        def refresh():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"[TYPEAHEAD] Failed to rebuild tries: {e}")
+            finally:
+                self._lock.release()
+
+        threading.Thread(target=refresh, name='typeahead-refresh', daemon=True).start()
+
+    def suggest(self, kind, prefix, limit=None):
+        """Returns prefix completions for one of KINDS"""
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown typeahead kind: {kind}")
+
+        self._refresh_in_background()
+        trie = self._tries.get(kind)
+        if trie is None:
+            return []
+
+        return trie.complete(prefix, limit or settings_manager.typeahead_limit)
@@ -0,0 +1,129 @@
+"""
+Write Buffer Module
+Write-behind buffer that batches partial-row writes into bulk Supabase updates
+"""
+import atexit
+import threading
+import time
+
+from postgrest import ReturnMethod
+
+
+class BulkUpdateBuffer:
+    """
+    Accumulates partial rows of existing records and writes them in bulk: each row holds
+    the key column plus only the columns to change. Rows with the same new values are
+    written with one UPDATE ... WHERE key IN (...), so columns that are not in the row are
+    never touched and no INSERT is attempted.
+    A batch is flushed when it reaches batch_size, when the oldest buffered row is
+    older than flush_interval seconds, and when the buffer is closed (or the process exits).
+    If a bulk write fails, its rows are retried one by one so failures are reported per row.
+    """
+
+    def __init__(self, supabase_client, table, key='id', batch_size=500,
+                 flush_interval=5.0, on_written=None):
+        self.supabase_client = supabase_client
+        self.table = table
+        self.key = key
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.on_written = on_written
+
+        self.written = 0
+        self.requests = 0
+        self.failures = []          # [(row, error message)]
+
+        self._rows = []
+        self._oldest_at = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._timer = threading.Thread(target=self._flush_on_interval, daemon=True)
+        self._timer.start()
+        atexit.register(self.close)
+
+    def add(self, row):
+        """Buffers one row, flushing when the batch is full"""
+        with self._lock:
+            self._rows.append(row)
+            if self._oldest_at is None:
+                self._oldest_at = time.monotonic()
+            full = len(self._rows) >= self.batch_size
+
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Writes everything currently buffered"""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._rows = self._rows, []
+                self._oldest_at = None
+
+            for start in range(0, len(rows), self.batch_size):
+                self._write_batch(rows[start:start + self.batch_size])
+
+    def _write_rows(self, rows):
+        groups = {}
+        for row in rows:
+            values = tuple(sorted((column, value) for column, value in row.items() if column != self.key))
+            groups.setdefault(values, []).append(row[self.key])
+
+        for values, keys in groups.items():
+            self.requests += 1
+            (
+                self.supabase_client.table(self.table)
+                .update(dict(values), returning=ReturnMethod.minimal)
+                .in_(self.key, keys)
+                .execute()
+            )
+
+    def _write_batch(self, rows):
+        if not rows:
+            return
+
+        try:
+            self._write_rows(rows)
+            written = rows
+        except Exception as batch_error:
+            print(f"[WRITE] Bulk write of {len(rows)} rows into {self.table} failed, retrying per row: {batch_error}")
+            written = []
+            for row in rows:
+                try:
+                    self._write_rows([row])
+                    written.append(row)
+                except Exception as row_error:
+                    print(f"  ✗ Write failed for {row.get(self.key)}: {row_error}")
+                    self.failures.append((row, str(row_error)))
+
+        self.written += len(written)
+        if written and self.on_written:
+            self.on_written(written)
+
+    def _flush_on_interval(self):
+        while not self._closed.wait(min(self.flush_interval, 1.0)):
+            with self._lock:
+                due = self._oldest_at is not None and time.monotonic() - self._oldest_at >= self.flush_interval
+            if due:
+                self.flush()
+
+    def close(self):
+        """Flushes remaining rows and stops the interval thread"""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self.flush()
+        atexit.unregister(self.close)
+
+    def report(self):
+        """Returns written/failed counts and the number of requests made"""
+        return {
+            'written': self.written,
+            'failed': len(self.failures),
+            'requests': self.requests,
+            'failures': [
+                {'id': row.get(self.key), 'error': error}
+                for row, error in self.failures
+            ],
+        }
+